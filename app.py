@@ -2,57 +2,344 @@
 Web application for MCP Tool Lister.
 """
 import asyncio
-import json
+import atexit
+import threading
 import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+import orjson
 from flask import Flask, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from config import ConfigParser, OpenAIConfig
+from config import CommandResolver, ConfigParser, OpenAIConfig
 from mcp_client import MCPToolLister
-from openai import OpenAI
-from functools import lru_cache
+from openai import AsyncOpenAI
 import hashlib
 from performance_monitor import monitor
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson for request parsing and jsonify."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of going
+        # through dumps()'s str and back
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option), mimetype=self.mimetype
+        )
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for all routes
 
-# Global cache for persistent connections
-_connection_cache = {}
+# Global LRU cache of connection pools, keyed by the servers they launch,
+# so configs that differ only in formatting share one set of MCP servers
+_connection_cache = OrderedDict()
+
+# Parsed configs keyed by the hash of their JSON text: (pool key, servers)
+_parsed_configs = OrderedDict()
 _openai_client = None
 
+# OpenAI configuration is read once at startup; see /api/reload-openai
+_openai_ready = OpenAIConfig.is_configured()
+
+# Maximum number of concurrent MCP connections kept per configuration
+MAX_CONNECTIONS_PER_CONFIG = 8
+
+# Maximum number of cached configurations, and how long (seconds) an
+# unused one is kept before its MCP servers are shut down
+MAX_CACHED_CONFIGS = 32
+MAX_PARSED_CONFIGS = 128
+IDLE_TTL = 600
+REAP_INTERVAL = 60
+
+# Fields /api/smart-query requires, in the order they are checked
+SMART_QUERY_REQUIRED_FIELDS = ('configString', 'serverName', 'toolName', 'query')
+
+# Configs larger than this (characters) are hashed off the event loop
+LARGE_CONFIG_SIZE = 64 * 1024
+
+# Long-lived event loop shared by all requests so cached MCP sessions
+# (and the stdio transports they own) survive between calls
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, daemon=True).start()
+
+
+def _run(coro):
+    """Run a coroutine on the shared event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+
+# Strong references to fire-and-forget tasks, so they aren't collected mid-run
+_background_tasks = set()
+
+
+def _log_task_error(task: asyncio.Task) -> None:
+    """Drop a finished background task, logging anything it raised."""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        app.logger.error("Background task failed", exc_info=task.exception())
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Start a background task on the running loop, keeping and logging it."""
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_log_task_error)
+    return task
+
+
+async def _close_cached_connections():
+    """Drop the parsed-config and pool caches and close every cached MCP connection.
+    
+    Runs on the shared loop, which is the only thread that mutates these caches.
+    """
+    pools = list(_connection_cache.values())
+    _connection_cache.clear()
+    _parsed_configs.clear()
+    CommandResolver.invalidate_cache()
+    await asyncio.gather(*(pool.close_all() for pool in pools), return_exceptions=True)
+
+
+@atexit.register
+def _shutdown_loop():
+    """Close cached connections and stop the shared event loop on exit."""
+    try:
+        _reaper.cancel()
+        _run(_close_cached_connections())
+    finally:
+        _loop.call_soon_threadsafe(_loop.stop)
+
 
 def get_openai_client():
-    """Get or create cached OpenAI client."""
+    """Get or create the cached async OpenAI client.
+    
+    Async, so a completion in flight doesn't stall MCP I/O for every other
+    request on the shared loop.
+    """
     global _openai_client
     if _openai_client is None:
-        _openai_client = OpenAI(api_key=OpenAIConfig.get_api_key())
+        _openai_client = AsyncOpenAI(api_key=OpenAIConfig.get_api_key())
     return _openai_client
 
 
-def get_config_hash(config_json: str) -> str:
-    """Generate hash for config to use as cache key."""
-    return hashlib.md5(config_json.encode()).hexdigest()
+def config_type_error(config_json, field: str):
+    """Return a 400 response unless the config is JSON text or a decoded object."""
+    if isinstance(config_json, (str, dict)):
+        return None
+    return jsonify({
+        'success': False,
+        'error': f'{field} must be a JSON string or object'
+    }), 400
+
+
+def get_config_hash(config_json) -> bytes:
+    """Generate hash for config (JSON text or decoded dict) to use as cache key."""
+    if isinstance(config_json, dict):
+        data = orjson.dumps(config_json, option=orjson.OPT_SORT_KEYS)
+    else:
+        data = config_json.encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).digest()
 
 
-async def get_or_create_connection(config_json: str) -> tuple:
-    """Get existing connection or create new one."""
-    config_hash = get_config_hash(config_json)
+def _servers_key(servers: dict) -> tuple:
+    """Identify a set of servers by what they launch."""
+    return tuple(
+        (name, server.command, tuple(server.args), tuple(sorted(server.env.items())))
+        for name, server in servers.items()
+    )
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when borrowing from a connection pool that has been closed."""
+
+
+class ConnectionPool:
+    """Bounded pool of MCP connections for a single configuration."""
+    
+    def __init__(self, servers: dict, max_size: int = MAX_CONNECTIONS_PER_CONFIG):
+        self.servers = servers
+        self.max_size = max_size
+        self.closed = False
+        self._idle = deque()
+        self._listers = []
+        # Connects in flight, counted against max_size before they finish
+        self._connecting = 0
+        # Futures of acquirers waiting for a released connection (or None,
+        # meaning "look again": a connect failed or the pool closed)
+        self._waiters = deque()
+        self.last_used = time.monotonic()
     
-    if config_hash in _connection_cache:
-        return _connection_cache[config_hash]
+    @property
+    def in_use(self) -> int:
+        """Number of connections currently borrowed."""
+        return len(self._listers) - len(self._idle)
     
-    # Create new connection
-    parser = ConfigParser()
-    servers = parser.parse_config(config_json, auto_resolve=True)
-    lister = MCPToolLister()
-    await lister.connect_to_servers(servers)
+    @property
+    def busy(self) -> bool:
+        """Whether any connection is borrowed, being opened, or waited for."""
+        return bool(self.in_use or self._connecting or self._waiters)
     
-    # Cache it
-    _connection_cache[config_hash] = (lister, servers)
-    return lister, servers
+    async def acquire(self) -> MCPToolLister:
+        """Take an idle connection, creating one if the pool is not full.
+        
+        Each connect reserves its slot up front, so a cold burst opens its
+        connections side by side; acquirers beyond max_size wait for the
+        first one released.
+        """
+        self.last_used = time.monotonic()
+        while True:
+            if self.closed:
+                raise PoolClosedError("Connection pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            if len(self._listers) + self._connecting < self.max_size:
+                return await self._connect()
+            
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                lister = await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled() and waiter.result() is not None:
+                    # Handed a connection just as we were cancelled
+                    self.release(waiter.result())
+                raise
+            if lister is not None:
+                return lister
+    
+    async def _connect(self) -> MCPToolLister:
+        """Open a new connection in a slot reserved by the caller's check."""
+        self._connecting += 1
+        try:
+            lister = MCPToolLister()
+            await lister.connect_to_servers(self.servers)
+        except BaseException:
+            self._connecting -= 1
+            # The slot is free again; let a waiter try to fill it
+            self._wake(None)
+            raise
+        self._connecting -= 1
+        if self.closed:
+            await lister.close_all_connections()
+            raise PoolClosedError("Connection pool is closed")
+        self._listers.append(lister)
+        return lister
+    
+    def _wake(self, lister: Optional[MCPToolLister]) -> bool:
+        """Hand a connection (or a wake-up) to the oldest live waiter."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(lister)
+                return True
+        return False
+    
+    def release(self, lister: MCPToolLister) -> None:
+        """Return a connection to the pool, or close it if the pool is closed."""
+        self.last_used = time.monotonic()
+        if self.closed:
+            if lister in self._listers:
+                self._listers.remove(lister)
+            _spawn(lister.close_all_connections())
+        elif not self._wake(lister):
+            self._idle.append(lister)
+    
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection for the duration of a block."""
+        lister = await self.acquire()
+        try:
+            yield lister
+        finally:
+            self.release(lister)
+    
+    async def close_all(self) -> None:
+        """Close the pool: idle connections now, borrowed ones as they are released.
+        
+        Pending acquirers are woken and fail with PoolClosedError.
+        """
+        self.closed = True
+        while self._wake(None):
+            pass
+        idle, self._idle = list(self._idle), deque()
+        self._listers = [lister for lister in self._listers if lister not in idle]
+        await asyncio.gather(
+            *(lister.close_all_connections() for lister in idle),
+            return_exceptions=True
+        )
 
 
-app = Flask(__name__)
+async def get_connection_pool(config_json) -> ConnectionPool:
+    """Get the connection pool for a config (JSON text or decoded dict), creating it if needed."""
+    if isinstance(config_json, str) and len(config_json) > LARGE_CONFIG_SIZE:
+        config_hash = await asyncio.to_thread(get_config_hash, config_json)
+    else:
+        config_hash = get_config_hash(config_json)
+    
+    entry = _parsed_configs.get(config_hash)
+    if entry is None:
+        # Parsing resolves command paths on disk, so keep it off the event loop
+        servers = await asyncio.to_thread(ConfigParser.parse_config, config_json, auto_resolve=True)
+        entry = _parsed_configs[config_hash] = (_servers_key(servers), servers)
+        while len(_parsed_configs) > MAX_PARSED_CONFIGS:
+            _parsed_configs.popitem(last=False)
+    else:
+        _parsed_configs.move_to_end(config_hash)
+    pool_key, servers = entry
+    
+    pool = _connection_cache.get(pool_key)
+    if pool is not None:
+        _connection_cache.move_to_end(pool_key)
+        return pool
+    pool = _connection_cache[pool_key] = ConnectionPool(servers)
+    
+    # Evict least recently used configs beyond the cap, skipping pools a
+    # request is still using (and the one being returned); the cap is
+    # exceeded until they go idle
+    excess = len(_connection_cache) - MAX_CACHED_CONFIGS
+    if excess > 0:
+        idle_keys = [
+            key for key, cached in _connection_cache.items()
+            if key != pool_key and not cached.busy
+        ][:excess]
+        for key in idle_keys:
+            _spawn(_connection_cache.pop(key).close_all())
+    return pool
+
+
+async def _reap_idle_pools():
+    """Periodically close connection pools that have been idle too long."""
+    while True:
+        await asyncio.sleep(REAP_INTERVAL)
+        now = time.monotonic()
+        for pool_key, pool in list(_connection_cache.items()):
+            if not pool.busy and now - pool.last_used > IDLE_TTL:
+                _connection_cache.pop(pool_key, None)
+                await pool.close_all()
+
+
+@asynccontextmanager
+async def pooled_connection(config_json: str):
+    """Borrow a pooled connection for a config, yielding (lister, servers)."""
+    pool = await get_connection_pool(config_json)
+    async with pool.connection() as lister:
+        yield lister, pool.servers
+
+
+_reaper = asyncio.run_coroutine_threadsafe(_reap_idle_pools(), _loop)
 
 
 @app.route('/')
@@ -70,7 +357,7 @@ def list_tools():
     Returns: {"success": bool, "data": {...}, "error": str}
     """
     try:
-        data = request.get_json()
+        data = request.get_json(force=True, silent=True, cache=False) or {}
         config_json = data.get('config', '')
         
         if not config_json:
@@ -79,8 +366,12 @@ def list_tools():
                 'error': 'No configuration provided'
             }), 400
         
+        error = config_type_error(config_json, 'config')
+        if error:
+            return error
+        
         # Run async tool listing
-        result = asyncio.run(fetch_tools(config_json))
+        result = _run(fetch_tools(config_json))
         
         return jsonify(result)
     
@@ -105,7 +396,7 @@ def execute_tool():
     Returns: {"success": bool, "result": {...}, "error": str}
     """
     try:
-        data = request.get_json()
+        data = request.get_json(force=True, silent=True, cache=False) or {}
         config_json = data.get('config', '')
         server_name = data.get('server_name', '')
         tool_name = data.get('tool_name', '')
@@ -117,6 +408,10 @@ def execute_tool():
                 'error': 'No configuration provided'
             }), 400
         
+        error = config_type_error(config_json, 'config')
+        if error:
+            return error
+        
         if not server_name:
             return jsonify({
                 'success': False,
@@ -130,7 +425,7 @@ def execute_tool():
             }), 400
         
         # Run async tool execution
-        result = asyncio.run(execute_mcp_tool(config_json, server_name, tool_name, arguments))
+        result = _run(execute_mcp_tool(config_json, server_name, tool_name, arguments))
         
         return jsonify(result)
     
@@ -152,14 +447,15 @@ async def fetch_tools(config_json: str) -> dict:
         Dictionary with results or error
     """
     try:
-        # Use persistent connection
-        lister, servers = await get_or_create_connection(config_json)
-        
-        # Get tools from all servers
-        all_tools = {}
-        for name in lister.server_names:
-            tools = await lister.get_tools_from_server(name)
-            all_tools[name] = tools
+        # Use persistent connection pool
+        async with pooled_connection(config_json) as (lister, servers):
+            # Get tools from all servers in parallel; each call already
+            # reports its own errors and returns [] for that server
+            names = list(lister.server_names)
+            results = await asyncio.gather(
+                *(lister.get_tools_from_server(name) for name in names)
+            )
+        all_tools = dict(zip(names, results))
         
         # Calculate totals
         total_tools = sum(len(tools) for tools in all_tools.values())
@@ -203,6 +499,31 @@ async def fetch_tools(config_json: str) -> dict:
         }
 
 
+_MISSING = object()
+
+
+def format_content_item(item) -> object:
+    """Convert a single MCP content item into a JSON-serializable value."""
+    text = getattr(item, 'text', _MISSING)
+    if text is not _MISSING:
+        return {'type': 'text', 'text': text}
+    data = getattr(item, 'data', _MISSING)
+    if data is not _MISSING:
+        return {'type': 'resource', 'data': data}
+    return str(item)
+
+
+def extract_result_text(result) -> str:
+    """Concatenate the text of all content items in an MCP tool result."""
+    content = getattr(result, 'content', None)
+    if content:
+        return ''.join([
+            text if (text := getattr(item, 'text', _MISSING)) is not _MISSING else str(item)
+            for item in content
+        ])
+    return str(result)
+
+
 async def execute_mcp_tool(config_json: str, server_name: str, tool_name: str, arguments: dict) -> dict:
     """
     Execute a tool on an MCP server.
@@ -217,59 +538,40 @@ async def execute_mcp_tool(config_json: str, server_name: str, tool_name: str, a
         Dictionary with results or error
     """
     try:
-        # Parse configuration
-        parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
+        # Use persistent connection pool
+        pool = await get_connection_pool(config_json)
         
-        if server_name not in servers:
+        if server_name not in pool.servers:
             return {
                 'success': False,
                 'error': f'Server "{server_name}" not found in configuration'
             }
         
-        # Execute tool
-        lister = MCPToolLister()
-        try:
-            await lister.connect_to_servers(servers)
-            
+        async with pool.connection() as lister:
             # Get session and call tool
             session = lister.client.get_session(server_name)
             result = await session.call_tool(tool_name, arguments)
+        
+        # Extract result content
+        content = getattr(result, 'content', None)
+        if content:
+            content_list = [format_content_item(item) for item in content]
             
-            # Extract result content
-            if hasattr(result, 'content') and result.content:
-                content_list = []
-                for item in result.content:
-                    if hasattr(item, 'text'):
-                        content_list.append({
-                            'type': 'text',
-                            'text': item.text
-                        })
-                    elif hasattr(item, 'data'):
-                        content_list.append({
-                            'type': 'resource',
-                            'data': item.data
-                        })
-                    else:
-                        content_list.append(str(item))
-                
-                return {
-                    'success': True,
-                    'result': {
-                        'content': content_list,
-                        'isError': getattr(result, 'isError', False)
-                    }
+            return {
+                'success': True,
+                'result': {
+                    'content': content_list,
+                    'isError': getattr(result, 'isError', False)
                 }
-            else:
-                return {
-                    'success': True,
-                    'result': {
-                        'content': [{'type': 'text', 'text': str(result)}],
-                        'isError': False
-                    }
+            }
+        else:
+            return {
+                'success': True,
+                'result': {
+                    'content': [{'type': 'text', 'text': str(result)}],
+                    'isError': False
                 }
-        finally:
-            await lister.close_all_connections()
+            }
     
     except ValueError as e:
         return {
@@ -298,13 +600,13 @@ def query():
     start_time = time.time()
     try:
         # Check if OpenAI is configured
-        if not OpenAIConfig.is_configured():
+        if not _openai_ready:
             return jsonify({
                 'success': False,
                 'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'
             }), 400
         
-        data = request.get_json()
+        data = request.get_json(force=True, silent=True, cache=False) or {}
         config_json = data.get('config', '')
         user_query = data.get('query', '')
         available_tools = data.get('tools', {})
@@ -315,8 +617,12 @@ def query():
                 'error': 'Missing config or query'
             }), 400
         
+        error = config_type_error(config_json, 'config')
+        if error:
+            return error
+        
         # Run async query processing
-        result = asyncio.run(process_ai_query(config_json, user_query, available_tools))
+        result = _run(process_ai_query(config_json, user_query, available_tools))
         
         # Add performance metrics
         elapsed = time.time() - start_time
@@ -331,30 +637,57 @@ def query():
         }), 500
 
 
+# Compiled OpenAI tool schemas keyed by the hash of the tools they came from
+MAX_TOOLS_SCHEMAS = 32
+_tools_schema_cache = OrderedDict()
+
+# Default parameters schema for tools that don't declare one
+_EMPTY_SCHEMA = {'type': 'object', 'properties': {}}
+
+
 def build_tools_schema(available_tools: dict) -> tuple:
-    """Build OpenAI tools schema and mapping (cached per request)."""
-    tools_for_openai = []
-    tool_mapping = {}
-    
-    for server_name, tools in available_tools.items():
-        for tool in tools:
-            function_name = f"{server_name}_{tool['name']}"
-            tool_mapping[function_name] = {
-                'server': server_name,
-                'tool': tool['name']
+    """Build OpenAI tools schema and mapping (cached by tools content).
+    
+    The key hashes the tools in their given order, so the schema keeps the
+    caller's server and tool order. The cache holds the compiled result as
+    JSON bytes and every caller decodes its own copy, so no caller can
+    mutate another's.
+    """
+    key = hashlib.blake2b(orjson.dumps(available_tools), digest_size=16).digest()
+    compiled = _tools_schema_cache.get(key)
+    if compiled is None:
+        compiled = _tools_schema_cache[key] = orjson.dumps(_compile_tools_schema(available_tools))
+        while len(_tools_schema_cache) > MAX_TOOLS_SCHEMAS:
+            _tools_schema_cache.popitem(last=False)
+    else:
+        _tools_schema_cache.move_to_end(key)
+    tools_for_openai, tool_mapping = orjson.loads(compiled)
+    return tools_for_openai, tool_mapping
+
+
+def _compile_tools_schema(available_tools: dict) -> tuple:
+    """Compile OpenAI tools schema and mapping from the servers' tool lists."""
+    entries = [
+        (f"{server_name}_{tool['name']}", server_name, tool)
+        for server_name, tools in available_tools.items()
+        for tool in tools
+    ]
+    
+    tool_mapping = {
+        function_name: {'server': server_name, 'tool': tool['name']}
+        for function_name, server_name, tool in entries
+    }
+    tools_for_openai = [
+        {
+            'type': 'function',
+            'function': {
+                'name': function_name,
+                'description': tool.get('description', 'No description'),
+                'parameters': tool.get('inputSchema', _EMPTY_SCHEMA)
             }
-            
-            tools_for_openai.append({
-                'type': 'function',
-                'function': {
-                    'name': function_name,
-                    'description': tool.get('description', 'No description'),
-                    'parameters': tool.get('inputSchema', {
-                        'type': 'object',
-                        'properties': {}
-                    })
-                }
-            })
+        }
+        for function_name, _, tool in entries
+    ]
     
     return tools_for_openai, tool_mapping
 
@@ -362,7 +695,7 @@ def build_tools_schema(available_tools: dict) -> tuple:
 async def execute_tool_call(lister, tool_call, tool_mapping):
     """Execute a single tool call (for parallel execution)."""
     function_name = tool_call.function.name
-    arguments = json.loads(tool_call.function.arguments)
+    arguments = orjson.loads(tool_call.function.arguments)
     
     if function_name not in tool_mapping:
         return None
@@ -375,15 +708,7 @@ async def execute_tool_call(lister, tool_call, tool_mapping):
     result = await session.call_tool(tool_name, arguments)
     
     # Extract result content
-    result_text = ""
-    if hasattr(result, 'content') and result.content:
-        for item in result.content:
-            if hasattr(item, 'text'):
-                result_text += item.text
-            else:
-                result_text += str(item)
-    else:
-        result_text = str(result)
+    result_text = extract_result_text(result)
     
     return {
         'tool_call_id': tool_call.id,
@@ -427,7 +752,7 @@ async def process_ai_query(config_json: str, user_query: str, available_tools: d
         ]
         
         # Call OpenAI with function calling
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model='gpt-4o-mini',
             messages=messages,
             tools=tools_for_openai if tools_for_openai else None,
@@ -439,70 +764,61 @@ async def process_ai_query(config_json: str, user_query: str, available_tools: d
         
         # Check if AI wants to call tools
         if assistant_message.tool_calls:
-            # Use persistent connection (reuse if exists)
-            lister, servers = await get_or_create_connection(config_json)
-            
-            # Execute all tool calls in parallel for speed
-            tool_tasks = [
-                execute_tool_call(lister, tool_call, tool_mapping)
-                for tool_call in assistant_message.tool_calls
-            ]
-            
-            # Wait for all tools to complete in parallel
-            tool_results_raw = await asyncio.gather(*tool_tasks, return_exceptions=True)
-
-            # Map results by tool_call_id for completeness
-            results_by_id = {}
-            for item in tool_results_raw:
-                if isinstance(item, Exception) or item is None:
-                    continue
-                results_by_id[item['tool_call_id']] = item
+            # Use persistent connection pool (reuse if exists)
+            async with pooled_connection(config_json) as (lister, servers):
+                # Execute all tool calls in parallel for speed
+                tool_tasks = [
+                    execute_tool_call(lister, tool_call, tool_mapping)
+                    for tool_call in assistant_message.tool_calls
+                ]
+                
+                # Wait for all tools to complete in parallel
+                tool_results_raw = await asyncio.gather(*tool_tasks, return_exceptions=True)
 
-            # Build one tool message per tool_call (required by API)
+            # Build the assistant tool_calls and one tool message per
+            # tool_call (required by API) in a single pass; gather keeps
+            # results in the same order as the tool calls
+            assistant_tool_calls = []
             tool_results = []
-            for tc in assistant_message.tool_calls:
-                tc_id = tc.id
-                if tc_id in results_by_id:
-                    r = results_by_id[tc_id]
-                    tool_calls_made.append({
-                        'server': r['server'],
-                        'tool': r['tool']
-                    })
-                    tool_results.append({
-                        'tool_call_id': r['tool_call_id'],
-                        'role': 'tool',
-                        'content': r['content'],
-                    })
-                else:
+            for tc, r in zip(assistant_message.tool_calls, tool_results_raw):
+                # Normalize assistant tool call into dict to avoid SDK object issues
+                assistant_tool_calls.append({
+                    'id': tc.id,
+                    'type': 'function',
+                    'function': {
+                        'name': tc.function.name,
+                        'arguments': tc.function.arguments,
+                    },
+                })
+                if isinstance(r, Exception) or r is None:
                     # Ensure every tool_call has a corresponding tool message
                     tool_results.append({
-                        'tool_call_id': tc_id,
+                        'tool_call_id': tc.id,
                         'role': 'tool',
                         'content': 'Tool execution failed or returned no result.',
                     })
+                    continue
+                tool_calls_made.append({
+                    'server': r['server'],
+                    'tool': r['tool']
+                })
+                tool_results.append({
+                    'tool_call_id': r['tool_call_id'],
+                    'role': 'tool',
+                    'content': r['content'],
+                })
             
             # Add tool results to conversation and get final response
-            # Normalize assistant message into dict to avoid SDK object issues
             assistant_dict = {
                 'role': 'assistant',
                 'content': assistant_message.content,
-                'tool_calls': [
-                    {
-                        'id': tc.id,
-                        'type': 'function',
-                        'function': {
-                            'name': tc.function.name,
-                            'arguments': tc.function.arguments,
-                        },
-                    }
-                    for tc in (assistant_message.tool_calls or [])
-                ],
+                'tool_calls': assistant_tool_calls,
             }
 
             messages.append(assistant_dict)
             messages.extend(tool_results)
             
-            final_response = client.chat.completions.create(
+            final_response = await client.chat.completions.create(
                 model='gpt-4o-mini',
                 messages=messages
             )
@@ -528,16 +844,9 @@ async def process_ai_query(config_json: str, user_query: str, available_tools: d
 @app.route('/api/clear-cache', methods=['POST'])
 def clear_cache():
     """Clear connection cache (useful for config changes)."""
-    global _connection_cache
     try:
-        # Close all cached connections
-        for config_hash, (lister, servers) in _connection_cache.items():
-            try:
-                asyncio.run(lister.close_all_connections())
-            except:
-                pass
-        
-        _connection_cache.clear()
+        # Clear the caches and close their connections on the shared loop
+        _run(_close_cached_connections())
         
         return jsonify({
             'success': True,
@@ -550,6 +859,19 @@ def clear_cache():
         }), 500
 
 
+@app.route('/api/reload-openai', methods=['POST'])
+def reload_openai():
+    """Re-read OpenAI configuration (useful after changing OPENAI_API_KEY)."""
+    global _openai_ready, _openai_client
+    _openai_ready = OpenAIConfig.is_configured()
+    _openai_client = None
+    
+    return jsonify({
+        'success': True,
+        'configured': _openai_ready
+    })
+
+
 @app.route('/api/smart-query', methods=['POST'])
 def smart_query():
     """
@@ -557,7 +879,7 @@ def smart_query():
     Optimized for external routing where tool selection is done elsewhere.
     
     Expects JSON: {
-        "configString": "...MCP config JSON string...",
+        "configString": "...MCP config JSON string..." (or the config object itself),
         "serverName": "server_name",
         "toolName": "tool_name", 
         "query": "user query text",
@@ -571,43 +893,33 @@ def smart_query():
     """
     start_time = time.time()
     try:
-        data = request.get_json()
-        config_string = data.get('configString', '')
-        server_name = data.get('serverName', '')
-        tool_name = data.get('toolName', '')
-        query = data.get('query', '')
-        use_ai = data.get('useAI', False)
-        
-        # Validation
-        if not config_string:
-            return jsonify({
-                'success': False,
-                'error': 'Missing configString'
-            }), 400
+        data = request.get_json(force=True, silent=True, cache=False)
+        if not isinstance(data, dict):
+            data = {}
         
-        if not server_name:
-            return jsonify({
-                'success': False,
-                'error': 'Missing serverName'
-            }), 400
+        # Validation: reject on the first missing field before any other work
+        for field in SMART_QUERY_REQUIRED_FIELDS:
+            if not data.get(field):
+                return jsonify({
+                    'success': False,
+                    'error': f'Missing {field}'
+                }), 400
         
-        if not tool_name:
-            return jsonify({
-                'success': False,
-                'error': 'Missing toolName'
-            }), 400
+        error = config_type_error(data['configString'], 'configString')
+        if error:
+            return error
         
-        if not query:
-            return jsonify({
-                'success': False,
-                'error': 'Missing query'
-            }), 400
+        config_string = data['configString']
+        server_name = data['serverName']
+        tool_name = data['toolName']
+        query = data['query']
+        use_ai = data.get('useAI', False)
         
         # Run async execution
         if use_ai:
-            result = asyncio.run(smart_query_with_ai(config_string, server_name, tool_name, query))
+            result = _run(smart_query_with_ai(config_string, server_name, tool_name, query))
         else:
-            result = asyncio.run(smart_query_direct(config_string, server_name, tool_name, query))
+            result = _run(smart_query_direct(config_string, server_name, tool_name, query))
         
         # Add performance metrics
         elapsed = time.time() - start_time
@@ -629,8 +941,9 @@ async def smart_query_direct(config_string: str, server_name: str, tool_name: st
     Fast execution for simple tool calls.
     """
     try:
-        # Use persistent connection
-        lister, servers = await get_or_create_connection(config_string)
+        # Use persistent connection pool
+        pool = await get_connection_pool(config_string)
+        servers = pool.servers
         
         # Verify server exists
         if server_name not in servers:
@@ -640,18 +953,19 @@ async def smart_query_direct(config_string: str, server_name: str, tool_name: st
             }
         
         # Get tool info to understand input schema
-        tools = await lister.get_tools_from_server(server_name)
-        tool_info = next((t for t in tools if t['name'] == tool_name), None)
+        async with pool.connection() as lister:
+            tools = await lister.get_tools_from_server(server_name)
+        tool_info = next((t for t in tools if t.name == tool_name), None)
         
         if not tool_info:
-            available_tools = [t['name'] for t in tools]
+            available_tools = [t.name for t in tools]
             return {
                 'success': False,
                 'error': f'Tool "{tool_name}" not found on server "{server_name}". Available tools: {available_tools}'
             }
         
         # Prepare arguments based on tool's input schema
-        input_schema = tool_info.get('inputSchema', {})
+        input_schema = tool_info.inputSchema
         properties = input_schema.get('properties', {})
         
         # Try to map query to the appropriate parameter
@@ -681,19 +995,12 @@ async def smart_query_direct(config_string: str, server_name: str, tool_name: st
             }
         
         # Execute the tool
-        session = lister.client.get_session(server_name)
-        result = await session.call_tool(tool_name, arguments)
+        async with pool.connection() as lister:
+            session = lister.client.get_session(server_name)
+            result = await session.call_tool(tool_name, arguments)
         
         # Extract result content
-        response_text = ""
-        if hasattr(result, 'content') and result.content:
-            for item in result.content:
-                if hasattr(item, 'text'):
-                    response_text += item.text
-                else:
-                    response_text += str(item)
-        else:
-            response_text = str(result)
+        response_text = extract_result_text(result)
         
         return {
             'success': True,
@@ -717,25 +1024,26 @@ async def smart_query_with_ai(config_string: str, server_name: str, tool_name: s
     """
     try:
         # Check if OpenAI is configured
-        if not OpenAIConfig.is_configured():
+        if not _openai_ready:
             return {
                 'success': False,
                 'error': 'OpenAI API key not configured. Set OPENAI_API_KEY or use useAI=false'
             }
         
-        # Use persistent connection
-        lister, servers = await get_or_create_connection(config_string)
+        # Use persistent connection pool
+        pool = await get_connection_pool(config_string)
         
         # Verify server exists
-        if server_name not in servers:
+        if server_name not in pool.servers:
             return {
                 'success': False,
                 'error': f'Server "{server_name}" not found in configuration'
             }
         
         # Get tool info
-        tools = await lister.get_tools_from_server(server_name)
-        tool_info = next((t for t in tools if t['name'] == tool_name), None)
+        async with pool.connection() as lister:
+            tools = await lister.get_tools_from_server(server_name)
+        tool_info = next((t for t in tools if t.name == tool_name), None)
         
         if not tool_info:
             return {
@@ -748,11 +1056,8 @@ async def smart_query_with_ai(config_string: str, server_name: str, tool_name: s
             'type': 'function',
             'function': {
                 'name': tool_name,
-                'description': tool_info.get('description', 'No description'),
-                'parameters': tool_info.get('inputSchema', {
-                    'type': 'object',
-                    'properties': {}
-                })
+                'description': tool_info.description,
+                'parameters': tool_info.inputSchema
             }
         }]
         
@@ -772,7 +1077,7 @@ async def smart_query_with_ai(config_string: str, server_name: str, tool_name: s
         ]
         
         # Call OpenAI with the specific tool
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model='gpt-4o-mini',
             messages=messages,
             tools=tools_for_openai,
@@ -784,22 +1089,15 @@ async def smart_query_with_ai(config_string: str, server_name: str, tool_name: s
         # Check if AI wants to call the tool
         if assistant_message.tool_calls:
             tool_call = assistant_message.tool_calls[0]
-            arguments = json.loads(tool_call.function.arguments)
+            arguments = orjson.loads(tool_call.function.arguments)
             
             # Execute the tool
-            session = lister.client.get_session(server_name)
-            result = await session.call_tool(tool_name, arguments)
+            async with pool.connection() as lister:
+                session = lister.client.get_session(server_name)
+                result = await session.call_tool(tool_name, arguments)
             
             # Extract result content
-            result_text = ""
-            if hasattr(result, 'content') and result.content:
-                for item in result.content:
-                    if hasattr(item, 'text'):
-                        result_text += item.text
-                    else:
-                        result_text += str(item)
-            else:
-                result_text = str(result)
+            result_text = extract_result_text(result)
             
             # Get final AI response with tool result
             assistant_dict = {
@@ -822,7 +1120,7 @@ async def smart_query_with_ai(config_string: str, server_name: str, tool_name: s
                 'content': result_text,
             })
             
-            final_response = client.chat.completions.create(
+            final_response = await client.chat.completions.create(
                 model='gpt-4o-mini',
                 messages=messages
             )
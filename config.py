@@ -1,19 +1,86 @@
 """
 Configuration handler for MCP servers with automatic command resolution.
 """
-import json
+import glob
 import os
+import re
 import shutil
+import stat
 import sys
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 
+if sys.platform == 'win32':
+    import ctypes
+    
+    _GetFileAttributesW = ctypes.windll.kernel32.GetFileAttributesW
+    _GetFileAttributesW.argtypes = [ctypes.c_wchar_p]
+    _GetFileAttributesW.restype = ctypes.c_uint32
+    _INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+    _FILE_ATTRIBUTE_DIRECTORY = 0x10
+    
+    def _is_file(path: str) -> bool:
+        """Check that path is an existing file with a single attribute query."""
+        attrs = _GetFileAttributesW(path)
+        return attrs != _INVALID_FILE_ATTRIBUTES and not attrs & _FILE_ATTRIBUTE_DIRECTORY
+else:
+    def _is_file(path: str) -> bool:
+        """Check that path is an existing regular file with a single stat call."""
+        try:
+            return stat.S_ISREG(os.stat(path).st_mode)
+        except (OSError, ValueError):
+            return False
+
+
+_PATH_SEPARATORS = tuple(sep for sep in (os.sep, os.altsep) if sep)
+
+
+def _looks_like_path(command: str) -> bool:
+    """Cheap string check for commands that could name a file directly."""
+    return os.path.isabs(command) or any(sep in command for sep in _PATH_SEPARATORS)
+
+
+def _python_minor_version(scripts_dir: str) -> int:
+    """Minor version XY of a Python3XY Scripts directory, or -1 if it has none."""
+    match = re.match(r'Python3(\d+)', os.path.basename(os.path.dirname(scripts_dir)))
+    return int(match.group(1)) if match else -1
+
+
+def _build_windows_search_dirs() -> tuple:
+    """Resolve the Windows fallback install directories once per process."""
+    if sys.platform != 'win32':
+        return ()
+    
+    home = os.path.join('C:/Users', os.getenv('USERNAME', ''))
+    local_appdata = os.environ.get('LOCALAPPDATA') or os.path.join(home, 'AppData', 'Local')
+    appdata = os.environ.get('APPDATA') or os.path.join(home, 'AppData', 'Roaming')
+    program_files = os.environ.get('ProgramFiles') or 'C:/Program Files'
+    
+    # Newest Python first, by version number (Python313 before Python39)
+    python_scripts = sorted(
+        glob.glob(os.path.join(local_appdata, 'Programs', 'Python', 'Python3*', 'Scripts')),
+        key=_python_minor_version,
+        reverse=True
+    )
+    return (
+        *((scripts, '.exe') for scripts in python_scripts),
+        (os.path.join(appdata, 'npm'), '.cmd'),
+        (os.path.join(program_files, 'nodejs'), '.cmd'),
+    )
+
+
+# (directory, extension) pairs searched when a command is not on PATH
+_WINDOWS_SEARCH_DIRS = _build_windows_search_dirs()
+
+
 class OpenAIConfig:
     """Configuration for OpenAI API."""
     
@@ -50,28 +117,25 @@ class MCPServerConfig:
 class CommandResolver:
     """Resolve and normalize commands for different platforms."""
     
-    # Command alternatives for fallback resolution
+    # Command alternatives for fallback resolution (the command itself is
+    # tried first by resolve_command, so it is not repeated here)
     COMMAND_ALTERNATIVES = {
-        'uvx': ['uvx', 'uv'],
-        'npx': ['npx', 'npm'],
-        'python': ['python', 'python3', 'py'],
-        'node': ['node', 'nodejs'],
+        'uvx': ('uv',),
+        'npx': ('npm',),
+        'python': ('python3', 'py'),
+        'node': ('nodejs',),
     }
     
     @staticmethod
     def _get_windows_search_paths(command: str) -> List[str]:
         """Get platform-specific search paths for Windows."""
-        username = os.getenv('USERNAME', '')
-        return [
-            f"C:/Users/{username}/AppData/Local/Programs/Python/Python313/Scripts/{command}.exe",
-            f"C:/Users/{username}/AppData/Roaming/npm/{command}.cmd",
-            f"C:/Program Files/nodejs/{command}.cmd",
-        ]
+        return [os.path.join(directory, command + ext) for directory, ext in _WINDOWS_SEARCH_DIRS]
     
     @staticmethod
+    @lru_cache(maxsize=256)
     def find_command(command: str) -> Optional[str]:
         """
-        Find the full path to a command.
+        Find the full path to a command (memoized per command string).
         
         Args:
             command: Command name (e.g., 'uvx', 'npx', 'python')
@@ -79,8 +143,8 @@ class CommandResolver:
         Returns:
             Full path to command or None if not found
         """
-        # Return if already a valid full path
-        if os.path.isfile(command):
+        # Return if already a valid full path (bare names skip the syscall)
+        if _looks_like_path(command) and _is_file(command):
             return command
         
         # Try system PATH first
@@ -91,11 +155,16 @@ class CommandResolver:
         # Try platform-specific locations
         if sys.platform == 'win32':
             for path in CommandResolver._get_windows_search_paths(command):
-                if os.path.isfile(path):
+                if _is_file(path):
                     return path
         
         return None
     
+    @staticmethod
+    def invalidate_cache() -> None:
+        """Drop memoized command lookups (e.g. after PATH or config changes)."""
+        CommandResolver.find_command.cache_clear()
+    
     @staticmethod
     def resolve_command(command: str, warn_on_missing: bool = False) -> str:
         """
@@ -108,22 +177,24 @@ class CommandResolver:
         Returns:
             Resolved command path (original if not found)
         """
-        # Return if already a valid full path
-        if os.path.isfile(command):
-            return command
-        
-        # Try to find the command as-is
+        # Try to find the command as-is (find_command accepts existing full paths)
         resolved = CommandResolver.find_command(command)
         if resolved:
             return resolved
         
-        # Try common alternatives for known commands
-        base_cmd = command.lower()
-        if base_cmd in CommandResolver.COMMAND_ALTERNATIVES:
-            for alt in CommandResolver.COMMAND_ALTERNATIVES[base_cmd]:
-                resolved = CommandResolver.find_command(alt)
-                if resolved:
-                    return resolved
+        # Try common alternatives for known commands (exact match first, so
+        # the usual lowercase names skip the .lower() copy)
+        alternatives = CommandResolver.COMMAND_ALTERNATIVES.get(command)
+        if alternatives is None:
+            base_cmd = command.lower()
+            alternatives = (
+                (base_cmd, *CommandResolver.COMMAND_ALTERNATIVES[base_cmd])
+                if base_cmd in CommandResolver.COMMAND_ALTERNATIVES else ()
+            )
+        for alt in alternatives:
+            resolved = CommandResolver.find_command(alt)
+            if resolved:
+                return resolved
         
         # Warn if requested and command not found
         if warn_on_missing:
@@ -159,12 +230,13 @@ class ConfigParser:
     """Parse and validate MCP server configurations."""
     
     @staticmethod
-    def parse_config(config_json: str, auto_resolve: bool = True) -> Dict[str, MCPServerConfig]:
+    def parse_config(config_json: Union[str, bytes, dict], auto_resolve: bool = True) -> Dict[str, MCPServerConfig]:
         """
         Parse MCP configuration JSON string.
         
         Args:
-            config_json: JSON string containing mcpServers configuration
+            config_json: JSON string, UTF-8 bytes, or an already-decoded dict
+                containing mcpServers configuration
             auto_resolve: Automatically resolve command paths (default: True)
             
         Returns:
@@ -173,12 +245,15 @@ class ConfigParser:
         Raises:
             ValueError: If JSON is invalid or required fields are missing
         """
-        try:
-            config_data = json.loads(config_json)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON: {e}")
+        if isinstance(config_json, dict):
+            config_data = config_json
+        else:
+            try:
+                config_data = orjson.loads(config_json)
+            except orjson.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e}")
         
-        if "mcpServers" not in config_data:
+        if not isinstance(config_data, dict) or "mcpServers" not in config_data:
             raise ValueError("Configuration must contain 'mcpServers' key")
         
         servers = {}
@@ -186,18 +261,20 @@ class ConfigParser:
             if "command" not in server_config:
                 raise ValueError(f"Server '{name}' missing required 'command' field")
             
-            config_obj = MCPServerConfig(
+            servers[name] = MCPServerConfig(
                 name=name,
                 command=server_config["command"],
-                args=server_config.get("args", []),
-                env=server_config.get("env", {})
+                # Own copies: a decoded dict is the caller's
+                args=list(server_config.get("args", [])),
+                env=dict(server_config.get("env", {}))
             )
-            
-            # Auto-resolve command paths if enabled
-            if auto_resolve:
-                config_obj = CommandResolver.normalize_server_config(config_obj)
-            
-            servers[name] = config_obj
+        
+        # Auto-resolve command paths if enabled
+        if auto_resolve:
+            servers = {
+                name: CommandResolver.normalize_server_config(config)
+                for name, config in servers.items()
+            }
         
         return servers
     
@@ -3,6 +3,7 @@ MCP Tool Lister - Main Application
 List all tools from MCP servers based on user configuration
 """
 import asyncio
+import sys
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
@@ -28,6 +29,10 @@ def get_config_input() -> str:
     Returns:
         JSON configuration string
     """
+    # Piped input (e.g. `python main.py < config.json`): read it in one go
+    if not sys.stdin.isatty():
+        return sys.stdin.read()
+    
     console.print("\n[yellow]Paste your MCP configuration (JSON format)[/yellow]")
     console.print("[dim]Press Enter twice when done:[/dim]\n")
     
@@ -75,15 +80,16 @@ async def main():
     """Main application entry point"""
     print_banner()
     
-    # Ask if user wants to see example
-    show_example = Prompt.ask(
-        "\n[cyan]Would you like to see an example configuration?[/cyan]",
-        choices=["y", "n"],
-        default="y"
-    )
-    
-    if show_example.lower() == 'y':
-        show_example_config()
+    # Ask if user wants to see example; piped input goes straight to the config
+    if sys.stdin.isatty():
+        show_example = Prompt.ask(
+            "\n[cyan]Would you like to see an example configuration?[/cyan]",
+            choices=["y", "n"],
+            default="y"
+        )
+        
+        if show_example.lower() == 'y':
+            show_example_config()
     
     # Get configuration from user
     config_json = get_config_input()
@@ -127,8 +133,7 @@ async def main():
             lister.display_tools(all_tools)
             
             # Summary
-            total_tools = sum(len(tools) for tools in all_tools.values())
-            console.print(f"\n[bold green]Total tools across all servers: {total_tools}[/bold green]")
+            console.print(f"\n[bold green]Total tools across all servers: {lister.total_tools}[/bold green]")
             
         finally:
             # Clean up connections
@@ -139,8 +144,7 @@ async def main():
         console.print(f"\n[red]Configuration error: {e}[/red]")
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
 if __name__ == "__main__":
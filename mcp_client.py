@@ -1,16 +1,38 @@
 """
 MCP Client wrapper for connecting to servers and retrieving tools.
 """
+import asyncio
+from dataclasses import dataclass, field
+from operator import attrgetter
 from typing import Any, Dict, List, Optional
 
 from mcp_use import MCPClient
 from rich.console import Console
+from rich.style import Style
 from rich.table import Table
 
 from config import MCPServerConfig
 
 console = Console()
 
+# Tool attributes copied into ToolInfo
+_TOOL_FIELDS = ("name", "description", "inputSchema")
+
+
+# Table styles parsed once and shared by every display_tools table
+_HEADER_STYLE = Style.parse("bold magenta")
+_NAME_STYLE = Style.parse("cyan")
+_DESCRIPTION_STYLE = Style.parse("white")
+_PARAMETERS_STYLE = Style.parse("yellow")
+
+
+@dataclass(slots=True)
+class ToolInfo:
+    """A tool exposed by an MCP server."""
+    name: str
+    description: Optional[str] = "No description"
+    inputSchema: Dict[str, Any] = field(default_factory=dict)
+
 
 class MCPToolLister:
     """Connect to MCP servers and list available tools."""
@@ -18,6 +40,13 @@ class MCPToolLister:
     def __init__(self):
         self.client: Optional[MCPClient] = None
         self.server_names: List[str] = []
+        self.total_tools: int = 0
+    
+    async def __aenter__(self) -> "MCPToolLister":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close_all_connections()
     
     def _build_client_config(self, servers: Dict[str, MCPServerConfig]) -> Dict[str, Any]:
         """
@@ -29,30 +58,35 @@ class MCPToolLister:
         Returns:
             Configuration dictionary for MCPClient
         """
-        config = {"mcpServers": {}}
+        self.server_names = list(servers)
         
-        for name, server_config in servers.items():
-            server_def = {
+        mcp_servers = {
+            name: {
                 "command": server_config.command,
                 "args": server_config.args,
+                **({"env": server_config.env} if server_config.env else {}),
             }
-            if server_config.env:
-                server_def["env"] = server_config.env
-            
-            config["mcpServers"][name] = server_def
-            self.server_names.append(name)
-            
-            # Show resolved command path
-            console.print(f"[dim]  {name}: {server_config.command}[/dim]")
+            for name, server_config in servers.items()
+        }
+        
+        # Show resolved command paths in a single console write
+        if servers:
+            console.print("\n".join(
+                f"[dim]  {name}: {server_config.command}[/dim]"
+                for name, server_config in servers.items()
+            ))
         
-        return config
+        return {"mcpServers": mcp_servers}
     
-    async def connect_to_servers(self, servers: Dict[str, MCPServerConfig]) -> None:
+    async def connect_to_servers(self, servers: Dict[str, MCPServerConfig], require_all: bool = True) -> None:
         """
         Connect to all MCP servers using MCPClient.
         
         Args:
             servers: Dictionary of server configurations
+            require_all: Fail unless every server connects (default: True);
+                otherwise keep the servers that did and drop the rest from
+                ``server_names``
             
         Raises:
             Exception: If connection fails
@@ -63,18 +97,40 @@ class MCPToolLister:
             
             console.print(f"\n[cyan]Connecting to {len(servers)} server(s)...[/cyan]")
             
-            # Create client and establish sessions
+            # Create client and start every server at once; MCPClient's
+            # create_all_sessions would bring them up one after another, and
+            # one server failing must not abandon the others mid-handshake
             self.client = MCPClient(config)
-            await self.client.create_all_sessions()
+            results = await asyncio.gather(
+                *(self.client.create_session(name) for name in self.server_names),
+                return_exceptions=True
+            )
+            
+            failed = {
+                name: result
+                for name, result in zip(self.server_names, results)
+                if isinstance(result, BaseException)
+            }
+            for name, error in failed.items():
+                console.print(f"[red]✗ Failed to connect to {name}: {error}[/red]")
             
-            console.print(f"[green]✓ Connected to all servers[/green]")
+            if failed and (require_all or len(failed) == len(results)):
+                # Don't leave the servers that did start running
+                await self.close_all_connections()
+                raise next(iter(failed.values()))
+            
+            if failed:
+                self.server_names = [name for name in self.server_names if name not in failed]
+                console.print(f"[green]✓ Connected to {len(self.server_names)} of {len(results)} servers[/green]")
+            else:
+                console.print(f"[green]✓ Connected to all servers[/green]")
             
         except Exception as e:
             console.print(f"[red]✗ Failed to connect: {e}[/red]")
             raise
     
-    @staticmethod
-    def _extract_input_schema(tool: Any) -> Dict[str, Any]:
+    @classmethod
+    def _extract_input_schema(cls, tool: Any) -> Dict[str, Any]:
         """
         Extract input schema from a tool object.
         
@@ -87,8 +143,19 @@ class MCPToolLister:
         if not hasattr(tool, 'inputSchema'):
             return {}
         
-        schema = tool.inputSchema
+        return cls._schema_to_dict(tool.inputSchema)
+    
+    @staticmethod
+    def _schema_to_dict(schema: Any) -> Dict[str, Any]:
+        """
+        Convert an input schema object to a dictionary.
         
+        Args:
+            schema: Schema as a dict, pydantic model or plain object
+            
+        Returns:
+            Dictionary representation of the input schema
+        """
         # Handle different schema types
         if isinstance(schema, dict):
             return schema
@@ -99,7 +166,7 @@ class MCPToolLister:
         
         return {}
     
-    async def get_tools_from_server(self, server_name: str) -> List[Dict[str, Any]]:
+    async def get_tools_from_server(self, server_name: str) -> List[ToolInfo]:
         """
         Get list of tools from a specific MCP server.
         
@@ -107,7 +174,7 @@ class MCPToolLister:
             server_name: Name of the server
             
         Returns:
-            List of tool definitions as dictionaries
+            List of tool definitions
         """
         try:
             session = self.client.get_session(server_name)
@@ -116,13 +183,23 @@ class MCPToolLister:
             # Handle different result formats
             tool_list = result.tools if hasattr(result, 'tools') else result
             
-            # Convert Tool objects to dictionaries
+            # Tools from one server share a type: when the first one exposes
+            # every field, read them with a single attrgetter per tool
+            if tool_list and all(hasattr(tool_list[0], attr) for attr in _TOOL_FIELDS):
+                fields = attrgetter(*_TOOL_FIELDS)
+                schema_to_dict = self._schema_to_dict
+                return [
+                    ToolInfo(name, description, schema if type(schema) is dict else schema_to_dict(schema))
+                    for name, description, schema in map(fields, tool_list)
+                ]
+            
+            # Convert other tool objects field by field
             return [
-                {
-                    "name": getattr(tool, 'name', str(tool)),
-                    "description": getattr(tool, 'description', "No description"),
-                    "inputSchema": self._extract_input_schema(tool)
-                }
+                ToolInfo(
+                    name=getattr(tool, 'name', str(tool)),
+                    description=getattr(tool, 'description', "No description"),
+                    inputSchema=self._extract_input_schema(tool)
+                )
                 for tool in tool_list
             ]
             
@@ -130,7 +207,7 @@ class MCPToolLister:
             console.print(f"[red]Error listing tools from {server_name}: {e}[/red]")
             return []
     
-    async def list_all_tools(self, servers: Dict[str, MCPServerConfig]) -> Dict[str, List[Dict[str, Any]]]:
+    async def list_all_tools(self, servers: Dict[str, MCPServerConfig]) -> Dict[str, List[ToolInfo]]:
         """
         Connect to all servers and list their tools.
         
@@ -139,16 +216,25 @@ class MCPToolLister:
             
         Returns:
             Dictionary mapping server names to their tool lists
+            (the combined count is stored in ``self.total_tools``)
         """
         all_tools = {}
+        self.total_tools = 0
         
         try:
-            await self.connect_to_servers(servers)
+            # Servers that fail to start are reported and listed with no tools
+            await self.connect_to_servers(servers, require_all=False)
             
-            # Get tools from each server
-            for name in self.server_names:
-                tools = await self.get_tools_from_server(name)
-                all_tools[name] = tools
+            # Query all servers concurrently; each call handles its own errors
+            results = await asyncio.gather(
+                *(self.get_tools_from_server(name) for name in self.server_names)
+            )
+            
+            all_tools = {name: [] for name in servers}
+            all_tools.update(zip(self.server_names, results))
+            self.total_tools = sum(map(len, results))
+            
+            for name, tools in all_tools.items():
                 console.print(f"[green]Found {len(tools)} tool(s) in {name}[/green]")
         
         except Exception as e:
@@ -182,21 +268,34 @@ class MCPToolLister:
             Formatted parameter string
         """
         properties = input_schema.get("properties", {})
-        required = input_schema.get("required", [])
         
         if not properties:
             return "None"
         
-        param_info = [
+        required = frozenset(input_schema.get("required", ()))
+        
+        return "\n".join(
             f"{name} ({details.get('type', 'any')}, "
             f"{'required' if name in required else 'optional'})"
             for name, details in properties.items()
-        ]
+        )
+    
+    @staticmethod
+    def _make_tools_table() -> Table:
+        """
+        Create an empty tools table using the pre-parsed styles.
         
-        return "\n".join(param_info)
+        Returns:
+            Table with name, description and parameter columns
+        """
+        table = Table(show_header=True, header_style=_HEADER_STYLE)
+        table.add_column("Tool Name", style=_NAME_STYLE, no_wrap=True)
+        table.add_column("Description", style=_DESCRIPTION_STYLE)
+        table.add_column("Parameters", style=_PARAMETERS_STYLE)
+        return table
     
     @classmethod
-    def display_tools(cls, all_tools: Dict[str, List[Dict[str, Any]]]) -> None:
+    def display_tools(cls, all_tools: Dict[str, List[ToolInfo]]) -> None:
         """
         Display tools in formatted tables.
         
@@ -212,16 +311,9 @@ class MCPToolLister:
             console.print(f"[dim]Total tools: {len(tools)}[/dim]\n")
             
             # Create and populate table
-            table = Table(show_header=True, header_style="bold magenta")
-            table.add_column("Tool Name", style="cyan", no_wrap=True)
-            table.add_column("Description", style="white")
-            table.add_column("Parameters", style="yellow")
+            table = cls._make_tools_table()
             
             for tool in tools:
-                name = tool.get("name", "Unknown")
-                description = tool.get("description", "No description")
-                params_str = cls._format_parameters(tool.get("inputSchema", {}))
-                
-                table.add_row(name, description, params_str)
+                table.add_row(tool.name, tool.description, cls._format_parameters(tool.inputSchema))
             
             console.print(table)
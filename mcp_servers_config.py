@@ -4,13 +4,19 @@ This module provides MCP server configurations and utilities
 """
 
 import json
-from typing import Dict, List, Any
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple
 
-class MCPServerConfig:
-    """MCP Server Configuration Manager"""
+import orjson
+
+
+@lru_cache(maxsize=None)
+def _load_catalog() -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Build the server catalog on first use instead of at import"""
     
     # Popular MCP Server Configurations
-    SERVERS = {
+    servers = {
         "filesystem": {
             "name": "Filesystem",
             "description": "Access and manage files on the local filesystem",
@@ -207,7 +213,7 @@ class MCPServerConfig:
     }
     
     # Python-based MCP Servers (both uvx and NPM alternatives for flexibility)
-    PYTHON_SERVERS = {
+    python_servers = {
         "fastmcp-demo": {
             "name": "FastMCP Demo",
             "description": "Example FastMCP server",
@@ -258,38 +264,68 @@ class MCPServerConfig:
         }
     }
     
+    return servers, python_servers
+
+
+class _CatalogAttribute:
+    """Class attribute that reads one part of the lazily built catalog"""
+    
+    def __init__(self, index: int):
+        self.index = index
+    
+    def __get__(self, instance, owner) -> Dict[str, Dict[str, Any]]:
+        return _load_catalog()[self.index]
+
+
+class MCPServerConfig:
+    """MCP Server Configuration Manager"""
+    
+    # Kept for callers that read the catalogs directly; built on first access
+    SERVERS = _CatalogAttribute(0)
+    PYTHON_SERVERS = _CatalogAttribute(1)
+    
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _merged_servers(cls) -> Dict[str, Dict[str, Any]]:
+        """Merge the server catalogs once, for internal lookups"""
+        servers, python_servers = _load_catalog()
+        return {**servers, **python_servers}
+    
     @classmethod
     def get_all_servers(cls) -> Dict[str, Dict[str, Any]]:
         """Get all available MCP servers"""
-        all_servers = {}
-        all_servers.update(cls.SERVERS)
-        all_servers.update(cls.PYTHON_SERVERS)
-        return all_servers
+        return dict(cls._merged_servers())
     
     @classmethod
     def get_server_config(cls, server_id: str) -> Dict[str, Any]:
         """Get configuration for a specific server"""
-        all_servers = cls.get_all_servers()
-        return all_servers.get(server_id)
+        return cls._merged_servers().get(server_id)
+    
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _category_index(cls) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Build the category -> {server_id: config} index once"""
+        index = defaultdict(dict)
+        for sid, config in cls._merged_servers().items():
+            if 'category' in config:
+                index[config['category']][sid] = config
+        return dict(index)
     
     @classmethod
     def get_servers_by_category(cls, category: str) -> Dict[str, Dict[str, Any]]:
         """Get all servers in a specific category"""
-        all_servers = cls.get_all_servers()
-        return {
-            sid: config for sid, config in all_servers.items()
-            if config.get('category') == category
-        }
+        return dict(cls._category_index().get(category, {}))
+    
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _sorted_categories(cls) -> tuple:
+        """Collect the unique categories once from the static catalog"""
+        return tuple(sorted(cls._category_index()))
     
     @classmethod
     def get_categories(cls) -> List[str]:
         """Get all unique categories"""
-        all_servers = cls.get_all_servers()
-        categories = set()
-        for config in all_servers.values():
-            if 'category' in config:
-                categories.add(config['category'])
-        return sorted(list(categories))
+        return list(cls._sorted_categories())
     
     @classmethod
     def generate_claude_config(cls, server_ids: List[str]) -> Dict[str, Any]:
@@ -298,7 +334,7 @@ class MCPServerConfig:
             "mcpServers": {}
         }
         
-        all_servers = cls.get_all_servers()
+        all_servers = cls._merged_servers()
         for sid in server_ids:
             if sid in all_servers:
                 server = all_servers[sid]
@@ -315,13 +351,13 @@ class MCPServerConfig:
     def export_config_json(cls, server_ids: List[str], filepath: str = None) -> str:
         """Export configuration to JSON file"""
         config = cls.generate_claude_config(server_ids)
-        json_str = json.dumps(config, indent=2)
+        json_bytes = orjson.dumps(config, option=orjson.OPT_INDENT_2)
         
         if filepath:
-            with open(filepath, 'w') as f:
-                f.write(json_str)
+            with open(filepath, 'wb') as f:
+                f.write(json_bytes)
         
-        return json_str
+        return json_bytes.decode()
 
 
 # Example usage
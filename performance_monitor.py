@@ -1,92 +1,111 @@
 """
 Performance monitoring utilities for tracking request times.
 """
+import asyncio
 import time
+from dataclasses import dataclass
 from functools import wraps
 from typing import Callable
 
 
+@dataclass(slots=True)
+class _Metric:
+    """Running totals for one tracked name (times are integer nanoseconds)."""
+    count: int = 0
+    total_time_ns: int = 0
+    min_time_ns: int = 0
+    max_time_ns: int = 0
+    failures: int = 0
+
+
 class PerformanceMonitor:
     """Simple performance monitoring for API endpoints."""
     
+    __slots__ = ('metrics',)
+    
     def __init__(self):
         self.metrics = {}
     
     def track(self, name: str):
         """Decorator to track execution time of functions."""
         def decorator(func: Callable):
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                start = time.time()
-                try:
-                    result = await func(*args, **kwargs)
-                    elapsed = time.time() - start
-                    self._record(name, elapsed, success=True)
-                    return result
-                except Exception as e:
-                    elapsed = time.time() - start
-                    self._record(name, elapsed, success=False)
-                    raise
+            # Bind the hot-path callables once so wrappers read closure cells
+            record = self._record
+            clock = time.perf_counter_ns
+            
+            # Build only the wrapper matching the function type
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = clock()
+                    success = False
+                    try:
+                        result = await func(*args, **kwargs)
+                        success = True
+                        return result
+                    finally:
+                        record(name, clock() - start, success)
+                
+                return async_wrapper
             
             @wraps(func)
             def sync_wrapper(*args, **kwargs):
-                start = time.time()
+                start = clock()
+                success = False
                 try:
                     result = func(*args, **kwargs)
-                    elapsed = time.time() - start
-                    self._record(name, elapsed, success=True)
+                    success = True
                     return result
-                except Exception as e:
-                    elapsed = time.time() - start
-                    self._record(name, elapsed, success=False)
-                    raise
+                finally:
+                    record(name, clock() - start, success)
             
-            # Return appropriate wrapper based on function type
-            import asyncio
-            if asyncio.iscoroutinefunction(func):
-                return async_wrapper
             return sync_wrapper
         
         return decorator
     
-    def _record(self, name: str, elapsed: float, success: bool):
-        """Record a metric."""
-        if name not in self.metrics:
-            self.metrics[name] = {
-                'count': 0,
-                'total_time': 0,
-                'min_time': float('inf'),
-                'max_time': 0,
-                'failures': 0
-            }
+    def _record(self, name: str, elapsed_ns: int, success: bool):
+        """Record a metric (times are integer nanoseconds)."""
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = _Metric()
+        
+        # The first sample seeds min/max; later ones only compare
+        if metric.count == 0:
+            metric.min_time_ns = metric.max_time_ns = elapsed_ns
+        elif elapsed_ns < metric.min_time_ns:
+            metric.min_time_ns = elapsed_ns
+        elif elapsed_ns > metric.max_time_ns:
+            metric.max_time_ns = elapsed_ns
         
-        metric = self.metrics[name]
-        metric['count'] += 1
-        metric['total_time'] += elapsed
-        metric['min_time'] = min(metric['min_time'], elapsed)
-        metric['max_time'] = max(metric['max_time'], elapsed)
+        metric.count += 1
+        metric.total_time_ns += elapsed_ns
         if not success:
-            metric['failures'] += 1
+            metric.failures += 1
+    
+    @staticmethod
+    def _summarize(name: str, metric: _Metric) -> dict:
+        """Convert a metric's running totals into reported stats."""
+        count = metric.count
+        return {
+            'name': name,
+            'avg_time': metric.total_time_ns * 1e-9 / count if count > 0 else 0,
+            'min_time': metric.min_time_ns * 1e-9,
+            'max_time': metric.max_time_ns * 1e-9,
+            'total_calls': count,
+            'failure_rate': metric.failures / count if count > 0 else 0
+        }
     
     def get_stats(self, name: str = None):
         """Get statistics for a specific metric or all metrics."""
         if name:
-            if name not in self.metrics:
-                return None
-            metric = self.metrics[name]
-            return {
-                'name': name,
-                'avg_time': metric['total_time'] / metric['count'] if metric['count'] > 0 else 0,
-                'min_time': metric['min_time'] if metric['min_time'] != float('inf') else 0,
-                'max_time': metric['max_time'],
-                'total_calls': metric['count'],
-                'failure_rate': metric['failures'] / metric['count'] if metric['count'] > 0 else 0
-            }
+            metric = self.metrics.get(name)
+            return self._summarize(name, metric) if metric is not None else None
         
-        # Return all metrics
+        # Return all metrics in a single pass over the table
+        summarize = self._summarize
         return {
-            name: self.get_stats(name)
-            for name in self.metrics.keys()
+            name: summarize(name, metric)
+            for name, metric in self.metrics.items()
         }
     
     def reset(self):
@@ -0,0 +1,20 @@
+"""
+Shared pytest fixtures for the test suite.
+Expensive setup lives here at session scope, so each worker builds it once.
+"""
+import pytest
+from http_utils import make_http_session
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Run async tests on asyncio, with one event loop for the whole session."""
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def http_session():
+    """One keep-alive requests session shared by every HTTP test."""
+    session = make_http_session()
+    yield session
+    session.close()
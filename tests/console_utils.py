@@ -0,0 +1,7 @@
+"""
+Shared Rich console for the test scripts.
+"""
+from rich.console import Console
+
+# One console per process; repr highlighting is off since output is mostly markup
+console = Console(highlight=False)
@@ -0,0 +1,18 @@
+"""
+Shared HTTP session setup for the tests that call the running app.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def make_http_session() -> requests.Session:
+    """Build a keep-alive session with a small blocking pool."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(
+        pool_connections=1, pool_maxsize=4, pool_block=True,
+        # Only failed connects are retried: the request was never sent, whereas
+        # re-sending a smart-query POST would run its tool call again
+        max_retries=Retry(total=2, read=False, backoff_factor=0.1)
+    ))
+    return session
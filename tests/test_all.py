@@ -3,40 +3,76 @@ Complete MCP Server Test Suite
 Tests all available MCP server formats: NPX, UVX, Docker
 """
 import asyncio
-from rich.console import Console
+import os
+from functools import lru_cache
+from pathlib import Path
 from rich.table import Table
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
+try:
+    import uvloop
+    _run = uvloop.run
+except ImportError:  # uvloop is optional (and not available on Windows)
+    _run = asyncio.run
 
+# How many configurations may have servers starting at the same time
+MAX_PARALLEL_TESTS = 4
 
-async def test_server(config_file: str, server_type: str) -> dict:
-    """Test a single server configuration."""
+_BAR = "[bold cyan]" + "═" * 40 + "[/bold cyan]"
+
+
+@lru_cache(maxsize=32)
+def _load_servers(config_file: str, mtime: float) -> dict:
+    """Read and parse a config file (cached until the file changes)."""
+    return ConfigParser.parse_config(Path(config_file).read_bytes(), auto_resolve=True)
+
+
+def _server_key(server) -> tuple:
+    """Identify a server by what it launches rather than what it is called."""
+    return (server.command, tuple(server.args), tuple(sorted(server.env.items())))
+
+
+async def test_server(config_file: str, server_type: str, shared: dict) -> dict:
+    """Test a single server configuration.
+    
+    ``shared`` maps server keys to futures of their tool lists, so a server
+    that appears in several configurations is only spawned once per run.
+    """
     try:
-        with open(config_file, "r") as f:
-            config_json = f.read()
+        # Other configs are starting servers meanwhile, so load off the event loop
+        mtime = await asyncio.to_thread(os.path.getmtime, config_file)
+        servers = await asyncio.to_thread(_load_servers, config_file, mtime)
         
-        parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
+        loop = asyncio.get_running_loop()
+        pending = {}
+        for name, server in servers.items():
+            key = _server_key(server)
+            if key not in shared:
+                shared[key] = loop.create_future()
+                pending[name] = server
         
-        lister = MCPToolLister()
-        try:
-            all_tools = await lister.list_all_tools(servers)
-            total_tools = sum(len(tools) for tools in all_tools.values())
-            
-            return {
-                "status": "✅ Pass",
-                "servers": len(servers),
-                "tools": total_tools,
-                "type": server_type,
-                "config": config_file
-            }
-        finally:
+        if pending:
+            all_tools = {}
             try:
-                await lister.close_all_connections()
-            except:
-                pass
+                async with MCPToolLister() as lister:
+                    all_tools = await lister.list_all_tools(pending)
+            finally:
+                for name, server in pending.items():
+                    shared[_server_key(server)].set_result(all_tools.get(name, []))
+        
+        total_tools = 0
+        for server in servers.values():
+            total_tools += len(await shared[_server_key(server)])
+        
+        return {
+            "status": "✅ Pass",
+            "servers": len(servers),
+            "tools": total_tools,
+            "type": server_type,
+            "config": config_file
+        }
     except Exception as e:
         return {
             "status": "❌ Fail",
@@ -49,9 +85,9 @@ async def test_server(config_file: str, server_type: str) -> dict:
 
 
 async def main():
-    console.print("[bold cyan]═" * 40 + "[/bold cyan]")
+    console.print(_BAR)
     console.print("[bold cyan]  MCP Server Complete Test Suite[/bold cyan]")
-    console.print("[bold cyan]═" * 40 + "[/bold cyan]\n")
+    console.print(f"{_BAR}\n")
     
     # Define test configurations
     tests = [
@@ -65,17 +101,27 @@ async def main():
     
     console.print("[yellow]Running comprehensive tests...[/yellow]\n")
     
-    results = []
-    for config_file, server_type in tests:
-        console.print(f"[cyan]Testing {server_type}...[/cyan]")
-        result = await test_server(config_file, server_type)
-        results.append(result)
-        console.print(f"  {result['status']} {server_type}\n")
+    # Start configs together (bounded); servers shared between configs start once
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_TESTS)
+    shared = {}
+    
+    async def run_bounded(config_file: str, server_type: str) -> dict:
+        async with semaphore:
+            console.print(f"[cyan]Testing {server_type}...[/cyan]")
+            return await test_server(config_file, server_type, shared)
+    
+    results = await asyncio.gather(
+        *(run_bounded(config_file, server_type) for config_file, server_type in tests)
+    )
+    
+    console.print()
+    for result in results:
+        console.print(f"  {result['status']} {result['type']}")
     
     # Display summary table
-    console.print("\n[bold cyan]═" * 40 + "[/bold cyan]")
+    console.print(f"\n{_BAR}")
     console.print("[bold green]Test Results Summary[/bold green]")
-    console.print("[bold cyan]═" * 40 + "[/bold cyan]\n")
+    console.print(f"{_BAR}\n")
     
     table = Table(show_header=True, header_style="bold magenta")
     table.add_column("Server Type", style="cyan")
@@ -107,16 +153,13 @@ async def main():
     console.print(f"  • Failed: [red]{total_tests - passed_tests}[/red]")
     console.print(f"  • Total Tools Discovered: [cyan]{total_tools}[/cyan]")
     
-    console.print("\n[bold cyan]═" * 40 + "[/bold cyan]")
+    console.print(f"\n{_BAR}")
     console.print("[bold green]✨ Test Suite Complete![/bold green]")
-    console.print("[bold cyan]═" * 40 + "[/bold cyan]\n")
+    console.print(f"{_BAR}\n")
 
 
 if __name__ == "__main__":
-    import warnings
-    warnings.filterwarnings("ignore", category=ResourceWarning)
-    
     try:
-        asyncio.run(main())
+        _run(main())
     except KeyboardInterrupt:
         console.print("\n[yellow]Test suite interrupted by user[/yellow]")
@@ -3,82 +3,81 @@ Comprehensive test with multiple MCP servers including Docker and UV-based
 Tests various types of MCP servers working together
 """
 import asyncio
-from rich.console import Console
+import sys
+from pathlib import Path
+from rich.table import Table
+from rich.text import Text
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
+
+# Static banner, markup parsed once at import
+_BANNER = Text.from_markup(
+    "[bold cyan]Comprehensive MCP Server Test[/bold cyan]\n\n"
+    "[yellow]Testing multiple server types:[/yellow]\n"
+    "  • Docker containerization (npx)\n"
+    "  • Python-based servers (uvx)\n"
+    "  • Node.js-based servers (npx)\n"
+    "[dim]Note: Docker Desktop should be running for full functionality[/dim]\n"
+)
+
+# Pre-styled cell for servers that returned nothing
+_NO_TOOLS = Text("Connection failed or no tools", style="red")
 
 
 async def main():
-    # Read config from file
-    with open("test_comprehensive.json", "r") as f:
-        config_json = f.read()
+    # Read config from file in a worker thread while the banner prints
+    config_task = asyncio.create_task(asyncio.to_thread(Path("test_comprehensive.json").read_bytes))
     
-    console.print("[bold cyan]Comprehensive MCP Server Test[/bold cyan]\n")
-    console.print("[yellow]Testing multiple server types:[/yellow]")
-    console.print("  • Docker containerization (npx)")
-    console.print("  • Python-based servers (uvx)")
-    console.print("  • Node.js-based servers (npx)")
-    console.print("[dim]Note: Docker Desktop should be running for full functionality[/dim]\n")
+    console.print(_BANNER)
+    
+    config_json = await config_task
     
     try:
         parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
+        # Command resolution does PATH lookups, so keep it off the event loop too
+        servers = await asyncio.to_thread(parser.parse_config, config_json, auto_resolve=True)
         
         console.print(f"[green]✓ Parsed {len(servers)} server(s)[/green]")
         
         console.print("\n[bold]Configured servers:[/bold]")
-        for name in servers.keys():
+        for name in servers:
             console.print(f"  • {name}")
         
         console.print("\n[cyan]Connecting to all MCP servers...[/cyan]")
-        lister = MCPToolLister()
-        
-        try:
+        async with MCPToolLister() as lister:
             all_tools = await lister.list_all_tools(servers)
             
-            console.print("\n" + "="*80)
-            console.print("[bold green]Server Summary[/bold green]")
-            console.print("="*80)
+            console.print("\n" + "="*80 + "\n[bold green]Server Summary[/bold green]\n" + "="*80)
             
-            # Show tool counts per server
+            # Show tool counts per server in one table rendered once
+            summary = Table(show_header=True, header_style="bold magenta")
+            summary.add_column("Server", style="cyan")
+            summary.add_column("Tools")
+            total_tools = 0
             for server_name, tools in all_tools.items():
-                if tools:
-                    console.print(f"  • [cyan]{server_name}[/cyan]: [green]{len(tools)} tools[/green]")
+                count = len(tools)
+                total_tools += count
+                if count:
+                    summary.add_row(server_name, Text(f"{count} tools", style="green"))
                 else:
-                    console.print(f"  • [cyan]{server_name}[/cyan]: [red]Connection failed or no tools[/red]")
+                    summary.add_row(server_name, _NO_TOOLS)
+            console.print(summary)
             
-            total_tools = sum(len(tools) for tools in all_tools.values())
             console.print(f"\n[bold green]Total tools available: {total_tools}[/bold green]")
             
             # Display detailed tool information
-            console.print("\n" + "="*80)
-            console.print("[bold green]Detailed Tool Listings[/bold green]")
-            console.print("="*80)
+            console.print("\n" + "="*80 + "\n[bold green]Detailed Tool Listings[/bold green]\n" + "="*80)
             
             lister.display_tools(all_tools)
-            
-        finally:
-            console.print("\n[cyan]Closing connections...[/cyan]")
-            try:
-                await lister.close_all_connections()
-            except Exception as close_error:
-                console.print(f"[dim]Cleanup completed with minor warnings[/dim]")
     
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
 if __name__ == "__main__":
-    import warnings
-    import sys
-    
-    # Suppress ResourceWarnings from asyncio cleanup
-    warnings.filterwarnings("ignore", category=ResourceWarning)
-    
     try:
         asyncio.run(main())
     except (KeyboardInterrupt, asyncio.exceptions.CancelledError, SystemExit):
@@ -0,0 +1,185 @@
+"""
+Unit tests for the app's per-config MCP connection pool.
+A fake lister stands in for MCPToolLister, so no MCP server is started.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import ConnectionPool, PoolClosedError, _run
+
+CONNECT_DELAY = 0.05
+
+
+class FakeLister:
+    """Stand-in for MCPToolLister that records connects and closes."""
+    
+    connects = 0
+    fail_next = False
+    
+    def __init__(self):
+        self.closed = False
+    
+    async def connect_to_servers(self, servers):
+        await asyncio.sleep(CONNECT_DELAY)
+        if FakeLister.fail_next:
+            FakeLister.fail_next = False
+            raise ConnectionError("connect failed")
+        FakeLister.connects += 1
+    
+    async def close_all_connections(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_lister(monkeypatch):
+    """Swap the pool's lister class for FakeLister."""
+    FakeLister.connects = 0
+    FakeLister.fail_next = False
+    monkeypatch.setattr(app_module, "MCPToolLister", FakeLister)
+
+
+async def _settle():
+    """Let callbacks and background tasks scheduled on the loop run."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+class TestAcquire:
+    """Borrowing and returning connections."""
+    
+    def test_release_reuses_connection(self):
+        """A released connection is handed to the next acquirer."""
+        async def scenario():
+            pool = ConnectionPool({})
+            async with pool.connection() as first:
+                assert pool.in_use == 1
+            async with pool.connection() as second:
+                pass
+            return first, second, pool.in_use
+        
+        first, second, in_use = _run(scenario())
+        assert first is second
+        assert in_use == 0
+        assert FakeLister.connects == 1
+    
+    def test_cold_burst_connects_side_by_side(self):
+        """Concurrent cold acquires each pay one connect, not one per earlier acquirer."""
+        async def scenario():
+            pool = ConnectionPool({}, max_size=3)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            listers = await asyncio.gather(*(pool.acquire() for _ in range(3)))
+            return loop.time() - start, listers
+        
+        elapsed, listers = _run(scenario())
+        assert len(set(map(id, listers))) == 3
+        assert elapsed < 2 * CONNECT_DELAY
+    
+    def test_full_pool_waits_for_release(self):
+        """Acquirers beyond max_size get the next released connection."""
+        async def scenario():
+            pool = ConnectionPool({}, max_size=1)
+            first = await pool.acquire()
+            waiter = asyncio.ensure_future(pool.acquire())
+            await _settle()
+            assert not waiter.done()
+            pool.release(first)
+            return first, await waiter
+        
+        first, second = _run(scenario())
+        assert first is second
+        assert FakeLister.connects == 1
+    
+    def test_failed_connect_frees_its_slot(self):
+        """A waiter retries the connect when the one it queued behind fails."""
+        async def scenario():
+            pool = ConnectionPool({}, max_size=1)
+            FakeLister.fail_next = True
+            results = await asyncio.gather(pool.acquire(), pool.acquire(), return_exceptions=True)
+            return pool, results
+        
+        pool, (failed, lister) = _run(scenario())
+        assert isinstance(failed, ConnectionError)
+        assert isinstance(lister, FakeLister)
+        assert pool.in_use == 1
+
+
+class TestClose:
+    """Closing a pool while it is in use."""
+    
+    def test_close_wakes_waiters(self):
+        """Acquirers blocked on a full pool fail instead of hanging."""
+        async def scenario():
+            pool = ConnectionPool({}, max_size=1)
+            await pool.acquire()
+            waiter = asyncio.ensure_future(pool.acquire())
+            await _settle()
+            await pool.close_all()
+            return await asyncio.wait_for(waiter, 1)
+        
+        with pytest.raises(PoolClosedError):
+            _run(scenario())
+    
+    def test_release_after_close_closes_lister(self):
+        """A connection borrowed across close_all is closed on release, not re-queued."""
+        async def scenario():
+            pool = ConnectionPool({})
+            lister = await pool.acquire()
+            await pool.close_all()
+            assert not lister.closed
+            pool.release(lister)
+            await _settle()
+            return pool, lister
+        
+        pool, lister = _run(scenario())
+        assert lister.closed
+        assert pool.in_use == 0
+        assert not pool.busy
+    
+    def test_close_closes_idle_connections(self):
+        """Idle connections are closed immediately and the pool refuses new borrows."""
+        async def scenario():
+            pool = ConnectionPool({})
+            async with pool.connection() as lister:
+                pass
+            await pool.close_all()
+            return pool, lister
+        
+        pool, lister = _run(scenario())
+        assert lister.closed
+        with pytest.raises(PoolClosedError):
+            _run(pool.acquire())
+
+
+class TestEviction:
+    """LRU eviction of cached pools."""
+    
+    def test_busy_pool_is_not_evicted(self, monkeypatch):
+        """A pool with a borrowed connection survives eviction; idle ones go first."""
+        monkeypatch.setattr(app_module, "MAX_CACHED_CONFIGS", 1)
+        monkeypatch.setattr(app_module, "_connection_cache", app_module.OrderedDict())
+        monkeypatch.setattr(app_module, "_parsed_configs", app_module.OrderedDict())
+        
+        def config(name):
+            return {"mcpServers": {name: {"command": "node", "args": [name]}}}
+        
+        async def scenario():
+            busy = await app_module.get_connection_pool(config("busy"))
+            lister = await busy.acquire()
+            idle = await app_module.get_connection_pool(config("idle"))
+            newest = await app_module.get_connection_pool(config("newest"))
+            await _settle()
+            return busy, lister, idle, newest
+        
+        busy, lister, idle, newest = _run(scenario())
+        cached = list(app_module._connection_cache.values())
+        assert cached == [busy, newest]
+        assert idle.closed
+        assert not busy.closed and not lister.closed
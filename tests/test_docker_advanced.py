@@ -3,24 +3,40 @@ Advanced Docker MCP Server Test
 Tests both containerization-assist-mcp and native Docker operations
 """
 import asyncio
-import subprocess
-from rich.console import Console
+from pathlib import Path
+import orjson
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
+try:
+    import uvloop
+    _run = uvloop.run
+except ImportError:  # uvloop is optional (and not available on Windows)
+    _run = asyncio.run
 
 
-def check_docker_status():
+async def _docker(*args: str, timeout: float = 5) -> tuple:
+    """Run a docker CLI command without blocking the event loop."""
+    proc = await asyncio.create_subprocess_exec(
+        "docker", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout
+
+
+async def check_docker_status():
     """Check if Docker Desktop is running"""
     try:
-        result = subprocess.run(
-            ["docker", "ps"], 
-            capture_output=True, 
-            text=True, 
-            timeout=5
-        )
-        return result.returncode == 0
+        returncode, _ = await _docker("ps")
+        return returncode == 0
     except Exception:
         return False
 
@@ -29,37 +45,32 @@ async def test_containerization_mcp():
     """Test containerization-assist-mcp server"""
     console.print("[bold cyan]Testing Containerization MCP Server[/bold cyan]\n")
     
-    with open("test_docker.json", "r") as f:
-        config_json = f.read()
+    # The Docker info probe runs alongside this test, so keep file and PATH work off the loop
+    config_json = await asyncio.to_thread(Path("test_docker.json").read_bytes)
     
     parser = ConfigParser()
-    servers = parser.parse_config(config_json, auto_resolve=True)
+    servers = await asyncio.to_thread(parser.parse_config, config_json, auto_resolve=True)
     
     console.print(f"[green]✓ Parsed {len(servers)} server(s)[/green]")
     
-    lister = MCPToolLister()
     try:
-        all_tools = await lister.list_all_tools(servers)
-        
-        console.print("\n" + "="*80)
-        console.print("[bold green]Containerization Tools[/bold green]")
-        console.print("="*80)
-        
-        lister.display_tools(all_tools)
-        
-        total_tools = sum(len(tools) for tools in all_tools.values())
-        console.print(f"\n[bold green]Total tools: {total_tools}[/bold green]")
-        
-        return True
-        
+        async with MCPToolLister() as lister:
+            all_tools = await lister.list_all_tools(servers)
+            
+            console.print("\n" + "="*80)
+            console.print("[bold green]Containerization Tools[/bold green]")
+            console.print("="*80)
+            
+            lister.display_tools(all_tools)
+            
+            total_tools = lister.total_tools
+            console.print(f"\n[bold green]Total tools: {total_tools}[/bold green]")
+            
+            return True
+    
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
         return False
-    finally:
-        try:
-            await lister.close_all_connections()
-        except Exception:
-            pass
 
 
 async def main():
@@ -67,7 +78,7 @@ async def main():
     
     # Check Docker status
     console.print("[cyan]Checking Docker Desktop status...[/cyan]")
-    docker_running = check_docker_status()
+    docker_running = await check_docker_status()
     
     if docker_running:
         console.print("[green]✓ Docker Desktop is running[/green]\n")
@@ -75,6 +86,11 @@ async def main():
         console.print("[yellow]⚠ Docker Desktop is not running[/yellow]")
         console.print("[dim]Some operations may be limited[/dim]\n")
     
+    # Query Docker in the background while the MCP server test runs
+    info_task = None
+    if docker_running:
+        info_task = asyncio.create_task(_docker("system", "info", "--format", "{{json .}}"))
+    
     # Test MCP server
     console.print("="*80)
     await test_containerization_mcp()
@@ -82,39 +98,17 @@ async def main():
     
     # Show Docker status
     console.print("\n[bold]Docker System Information:[/bold]")
-    if docker_running:
+    if info_task:
         try:
-            # Get Docker version
-            result = subprocess.run(
-                ["docker", "version", "--format", "{{.Server.Version}}"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                console.print(f"  Docker Version: {result.stdout.strip()}")
-            
-            # Count containers
-            result = subprocess.run(
-                ["docker", "ps", "-a", "--format", "{{.ID}}"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                container_count = len(result.stdout.strip().split('\n')) if result.stdout.strip() else 0
-                console.print(f"  Total Containers: {container_count}")
-            
-            # Count images
-            result = subprocess.run(
-                ["docker", "images", "--format", "{{.ID}}"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                image_count = len(result.stdout.strip().split('\n')) if result.stdout.strip() else 0
-                console.print(f"  Total Images: {image_count}")
+            # One daemon round trip for version, container and image counts
+            returncode, stdout = await info_task
+            if returncode == 0:
+                info = orjson.loads(stdout)
+                console.print(
+                    f"  Docker Version: {info.get('ServerVersion', 'unknown')}\n"
+                    f"  Total Containers: {info.get('Containers', 0)}\n"
+                    f"  Total Images: {info.get('Images', 0)}"
+                )
                 
         except Exception as e:
             console.print(f"[dim]Could not retrieve Docker info: {e}[/dim]")
@@ -125,10 +119,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    import warnings
-    warnings.filterwarnings("ignore", category=ResourceWarning)
-    
     try:
-        asyncio.run(main())
+        _run(main())
     except (KeyboardInterrupt, asyncio.exceptions.CancelledError):
         console.print("\n[yellow]Test interrupted[/yellow]")
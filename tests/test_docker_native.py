@@ -3,16 +3,25 @@ Native Docker Operations Test
 Uses built-in Copilot MCP Docker tools (requires Docker Desktop running)
 """
 import asyncio
-from rich.console import Console
-from rich.table import Table
+from importlib.util import find_spec
+from console_utils import console
 
-console = Console()
+# Probe for the Copilot Docker tools once instead of attempting the import per call
+_HAS_DOCKER_MCP = find_spec("mcp_copilot_conta_list_networks") is not None
+
+# Error text that means Docker Desktop itself isn't reachable
+_DOCKER_DOWN_NEEDLES = ("cannot find the file", "connection")
 
 
 async def test_docker_operations():
     """Test native Docker operations using Copilot MCP tools"""
     console.print("[bold cyan]Testing Native Docker Operations[/bold cyan]\n")
     
+    if not _HAS_DOCKER_MCP:
+        console.print("[yellow]⚠ Docker MCP tools not available in this context[/yellow]")
+        console.print("[dim]These tools are available when Docker Desktop is running[/dim]")
+        return False
+    
     try:
         # Import the Docker MCP tools
         from mcp_copilot_conta_list_networks import mcp_copilot_conta_list_networks
@@ -24,6 +33,9 @@ async def test_docker_operations():
         
         # Display networks
         if networks:
+            # Only needed when Docker is reachable, so don't pay for it at import
+            from rich.table import Table
+            
             table = Table(title="Docker Networks")
             table.add_column("Name", style="cyan")
             table.add_column("Driver", style="yellow")
@@ -40,12 +52,9 @@ async def test_docker_operations():
         
         return True
         
-    except ImportError:
-        console.print("[yellow]⚠ Docker MCP tools not available in this context[/yellow]")
-        console.print("[dim]These tools are available when Docker Desktop is running[/dim]")
-        return False
     except Exception as e:
-        if "cannot find the file" in str(e).lower() or "connection" in str(e).lower():
+        error = str(e).lower()
+        if any(needle in error for needle in _DOCKER_DOWN_NEEDLES):
             console.print("[red]✗ Docker Desktop is not running[/red]")
             console.print("[yellow]Please start Docker Desktop and try again[/yellow]")
         else:
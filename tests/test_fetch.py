@@ -2,17 +2,15 @@
 Test with fetch MCP server
 """
 import asyncio
-from rich.console import Console
+from pathlib import Path
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
-
 
 async def main():
     # Read config from file
-    with open("test_config_fetch.json", "r") as f:
-        config_json = f.read()
+    config_json = Path("test_config_fetch.json").read_bytes()
     
     console.print("[cyan]Testing Fetch MCP Server...[/cyan]\n")
     
@@ -23,13 +21,11 @@ async def main():
         console.print(f"[green]✓ Found {len(servers)} server(s)[/green]")
         
         console.print("\n[bold]Configured servers:[/bold]")
-        for name in servers.keys():
+        for name in servers:
             console.print(f"  • {name}")
         
         console.print("\n[cyan]Connecting to MCP servers...[/cyan]")
-        lister = MCPToolLister()
-        
-        try:
+        async with MCPToolLister() as lister:
             all_tools = await lister.list_all_tools(servers)
             
             console.print("\n" + "="*80)
@@ -38,17 +34,12 @@ async def main():
             
             lister.display_tools(all_tools)
             
-            total_tools = sum(len(tools) for tools in all_tools.values())
+            total_tools = lister.total_tools
             console.print(f"\n[bold green]Total tools across all servers: {total_tools}[/bold green]")
-            
-        finally:
-            console.print("\n[cyan]Closing connections...[/cyan]")
-            await lister.close_all_connections()
     
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
 if __name__ == "__main__":
@@ -3,35 +3,34 @@ Test with Git MCP server (NPX-based)
 Demonstrates Git operations through MCP
 """
 import asyncio
-from rich.console import Console
+from pathlib import Path
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
-
 
 async def main():
-    # Read config from file
-    with open("test_git.json", "r") as f:
-        config_json = f.read()
+    # Read config from file in a worker thread while the banner prints
+    config_task = asyncio.create_task(asyncio.to_thread(Path("test_git.json").read_bytes))
     
     console.print("[bold cyan]Testing Git MCP Server[/bold cyan]\n")
     console.print("[yellow]This will test Git operations through MCP[/yellow]\n")
     
+    config_json = await config_task
+    
     try:
         parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
+        # Command resolution does PATH lookups, so keep it off the event loop too
+        servers = await asyncio.to_thread(parser.parse_config, config_json, auto_resolve=True)
         
         console.print(f"[green]✓ Found {len(servers)} server(s)[/green]")
         
         console.print("\n[bold]Configured servers:[/bold]")
-        for name in servers.keys():
+        for name in servers:
             console.print(f"  • {name}")
         
         console.print("\n[cyan]Connecting to MCP servers...[/cyan]")
-        lister = MCPToolLister()
-        
-        try:
+        async with MCPToolLister() as lister:
             all_tools = await lister.list_all_tools(servers)
             
             console.print("\n" + "="*80)
@@ -40,23 +39,15 @@ async def main():
             
             lister.display_tools(all_tools)
             
-            total_tools = sum(len(tools) for tools in all_tools.values())
+            total_tools = lister.total_tools
             console.print(f"\n[bold green]Total tools available: {total_tools}[/bold green]")
-            
-        finally:
-            console.print("\n[cyan]Closing connections...[/cyan]")
-            await lister.close_all_connections()
     
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
 if __name__ == "__main__":
-    import warnings
-    warnings.filterwarnings("ignore", category=ResourceWarning)
-    
     try:
         asyncio.run(main())
     except (KeyboardInterrupt, asyncio.exceptions.CancelledError):
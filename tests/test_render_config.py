@@ -8,17 +8,14 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from rich.console import Console
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
-
 
 async def main():
     # Read config from file
-    with open("test_render_config.json", "r") as f:
-        config_json = f.read()
+    config_json = Path("test_render_config.json").read_bytes()
     
     console.print("[cyan]Testing Render-Compatible MCP Servers (NPX-based)...[/cyan]\n")
     console.print("[dim]These servers work on Render deployment[/dim]\n")
@@ -36,9 +33,7 @@ async def main():
             console.print(f"    Args: {config.args}")
         
         console.print("\n[cyan]Connecting to MCP servers...[/cyan]")
-        lister = MCPToolLister()
-        
-        try:
+        async with MCPToolLister() as lister:
             all_tools = await lister.list_all_tools(servers)
             
             console.print("\n" + "="*80)
@@ -47,20 +42,15 @@ async def main():
             
             lister.display_tools(all_tools)
             
-            total_tools = sum(len(tools) for tools in all_tools.values())
+            total_tools = lister.total_tools
             console.print(f"\n[bold green]Total tools across all servers: {total_tools}[/bold green]")
             
             console.print("\n[green]✓ All servers working - ready for Render deployment![/green]")
-            
-        finally:
-            console.print("\n[cyan]Closing connections...[/cyan]")
-            await lister.close_all_connections()
     
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
         console.print("[yellow]This configuration may not work on Render[/yellow]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
 if __name__ == "__main__":
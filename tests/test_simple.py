@@ -5,13 +5,10 @@ import asyncio
 import sys
 from pathlib import Path
 
-from rich.console import Console
-
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
-
 
 async def run_test(config_file: str = "test_config.json") -> None:
     """
@@ -21,14 +18,13 @@ async def run_test(config_file: str = "test_config.json") -> None:
         config_file: Path to the configuration file
     """
     try:
-        # Read config from file
-        config_path = Path(config_file)
-        if not config_path.exists():
+        # Read config from file (one open; a missing file surfaces as an error)
+        try:
+            config_json = Path(config_file).read_bytes()
+        except FileNotFoundError:
             console.print(f"[red]Error: Config file '{config_file}' not found[/red]")
             return
         
-        config_json = config_path.read_text(encoding='utf-8')
-        
         console.print("[cyan]Testing MCP Tool Lister...[/cyan]\n")
         
         # Parse configuration
@@ -40,14 +36,12 @@ async def run_test(config_file: str = "test_config.json") -> None:
         
         # List server names
         console.print("\n[bold]Configured servers:[/bold]")
-        for name in servers.keys():
+        for name in servers:
             console.print(f"  • {name}")
         
         # Connect to servers and list tools
         console.print("\n[cyan]Connecting to MCP servers...[/cyan]")
-        lister = MCPToolLister()
-        
-        try:
+        async with MCPToolLister() as lister:
             all_tools = await lister.list_all_tools(servers)
             
             # Display results
@@ -58,12 +52,8 @@ async def run_test(config_file: str = "test_config.json") -> None:
             lister.display_tools(all_tools)
             
             # Summary
-            total_tools = sum(len(tools) for tools in all_tools.values())
+            total_tools = lister.total_tools
             console.print(f"\n[bold green]Total tools across all servers: {total_tools}[/bold green]")
-            
-        finally:
-            console.print("\n[cyan]Closing connections...[/cyan]")
-            await lister.close_all_connections()
     
     except ValueError as e:
         console.print(f"\n[red]Configuration error: {e}[/red]")
@@ -2,113 +2,126 @@
 Tests for the smart-query API endpoint.
 Tests both direct execution and AI-assisted modes.
 """
+import asyncio
 import pytest
-import json
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app
+import app as app_module
+from app import app, _run, pooled_connection
+
+# Configure the app once at import; every test shares a single client
+app.testing = True
+_CLIENT = app.test_client()
+
+# Whether real OpenAI calls can run, decided once for the session
+HAS_OPENAI_KEY = bool(os.environ.get('OPENAI_API_KEY'))
 
 
 @pytest.fixture
 def client():
-    """Create test client."""
-    app.config['TESTING'] = True
-    with app.test_client() as client:
-        yield client
+    """Shared Flask test client."""
+    return _CLIENT
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def playwright_config():
-    """Playwright MCP server configuration."""
-    return json.dumps({
+    """Playwright MCP server configuration (sent as an object, not a JSON string)."""
+    return {
         "mcpServers": {
             "playwright": {
                 "command": "npx",
                 "args": ["@playwright/mcp@latest"]
             }
         }
-    })
+    }
 
 
-@pytest.fixture
-def population_canada_config():
-    """Population of Canada MCP server configuration."""
+# Population of Canada MCP server script (as served by BuildACopilot)
+_POPULATION_SERVER_JS = "// Fetch and execute MCP server from BuildACopilot\nimport { createServer } from 'http';\nimport { spawn } from 'child_process';\n\nconst ENDPOINT = 'https://buildacopilot.com/api/prompt-hub/agents/population-of-canada/chat';\nconst NAME = 'population of canada';\nconst SLUG = 'population-of-canada';\nconst DESC = 'As an expert in demographic analysis, your task is to provide a detailed overview of Canada\\'s population trends over the past decade.';\n\n\n// Simple JSON-RPC MCP server\nlet buffer = '';\nprocess.stdin.on('data', async (chunk) => {\n  buffer += chunk;\n  const lines = buffer.split('\\n');\n  buffer = lines.pop() || '';\n  \n  for (const line of lines) {\n    if (!line.trim()) continue;\n    try {\n      const msg = JSON.parse(line);\n      \n      if (!msg || typeof msg !== 'object') {\n        console.error('Invalid message format');\n        continue;\n      }\n      \n      if (msg.id === null || msg.id === undefined) {\n        console.error('Received notification:', msg.method || 'unknown');\n        continue;\n      }\n      \n      let result = null;\n      \n      if (msg.method === 'initialize') {\n        result = { \n          protocolVersion: '2024-11-05', \n          capabilities: { \n            tools: {} \n          }, \n          serverInfo: { \n            name: NAME || 'Agent', \n            version: '1.0.0' \n          } \n        };\n      } else if (msg.method === 'tools/list') {\n        result = { \n          tools: [{ \n            name: SLUG || 'agent', \n            description: DESC || 'AI Agent', \n            inputSchema: { \n              type: 'object', \n              properties: { \n                query: { \n                  type: 'string', \n                  description: 'The query or message to send to the agent' \n                } \n              }, \n              required: ['query'] \n            } \n          }] \n        };\n      } else if (msg.method === 'tools/call') {\n        try {\n          if (!msg.params || !msg.params.arguments) {\n            throw new Error('Missing params.arguments in request');\n          }\n          const query = msg.params.arguments.query;\n          if (!query || typeof query !== 'string') {\n            throw new Error('Missing or invalid required parameter: query (must be a string)');\n          }\n          const headers = { 'Content-Type': 'application/json'  };\n          const res = await fetch(ENDPOINT, { \n            method: 'POST', \n            headers, \n            body: JSON.stringify({ query: query }) \n          });\n          if (!res.ok) {\n            const errText = await res.text();\n            throw new Error('API Error ' + res.status + ': ' + errText.substring(0, 200));\n          }\n          const data = await res.json();\n          const responseText = String(data.response || data.message || JSON.stringify(data));\n          result = { \n            content: [{ \n              type: 'text', \n              text: responseText \n            }] \n          };\n        } catch (callErr) {\n          result = { \n            content: [{ \n              type: 'text', \n              text: 'Error calling agent: ' + String(callErr.message || callErr) \n            }],\n            isError: true \n          };\n        }\n      } else {\n        throw new Error('Unknown method: ' + (msg.method || 'undefined'));\n      }\n      \n      if (result !== null) {\n        const response = { \n          jsonrpc: '2.0', \n          id: msg.id, \n          result: result \n        };\n        process.stdout.write(JSON.stringify(response) + '\\n');\n      }\n    } catch (err) {\n      console.error('MCP Error:', err.message || String(err));\n      try {\n        const parsedMsg = JSON.parse(line);\n        if (parsedMsg && parsedMsg.id !== null && parsedMsg.id !== undefined) {\n          const errorResponse = { \n            jsonrpc: '2.0', \n            id: parsedMsg.id, \n            error: { \n              code: -32603, \n              message: String(err.message || err || 'Internal error') \n            } \n          };\n          process.stdout.write(JSON.stringify(errorResponse) + '\\n');\n        }\n      } catch (parseErr) {\n        console.error('Failed to parse error response:', parseErr.message);\n      }\n    }\n  }\n});\n\nprocess.stdin.setEncoding('utf8');\nprocess.stdin.resume();\nconsole.error('population of canada MCP server ready');"
+
+
+@pytest.fixture(scope="session")
+def population_canada_config(tmp_path_factory):
+    """Population of Canada MCP server configuration (sent as an object).
+    
+    The script is written to a module file once per session so node loads it
+    from disk (and its compile cache, on Node 22+) rather than re-parsing an
+    inline -e argument on every spawn.
+    """
+    script_path = tmp_path_factory.mktemp("mcp_servers") / "population_of_canada.mjs"
+    script_path.write_text(_POPULATION_SERVER_JS, encoding="utf-8")
+    
     config = {
         "mcpServers": {
             "population-of-canada": {
                 "command": "node",
-                "args": [
-                    "--input-type=module",
-                    "-e",
-                    "// Fetch and execute MCP server from BuildACopilot\nimport { createServer } from 'http';\nimport { spawn } from 'child_process';\n\nconst ENDPOINT = 'https://buildacopilot.com/api/prompt-hub/agents/population-of-canada/chat';\nconst NAME = 'population of canada';\nconst SLUG = 'population-of-canada';\nconst DESC = 'As an expert in demographic analysis, your task is to provide a detailed overview of Canada\\'s population trends over the past decade.';\n\n\n// Simple JSON-RPC MCP server\nlet buffer = '';\nprocess.stdin.on('data', async (chunk) => {\n  buffer += chunk;\n  const lines = buffer.split('\\n');\n  buffer = lines.pop() || '';\n  \n  for (const line of lines) {\n    if (!line.trim()) continue;\n    try {\n      const msg = JSON.parse(line);\n      \n      if (!msg || typeof msg !== 'object') {\n        console.error('Invalid message format');\n        continue;\n      }\n      \n      if (msg.id === null || msg.id === undefined) {\n        console.error('Received notification:', msg.method || 'unknown');\n        continue;\n      }\n      \n      let result = null;\n      \n      if (msg.method === 'initialize') {\n        result = { \n          protocolVersion: '2024-11-05', \n          capabilities: { \n            tools: {} \n          }, \n          serverInfo: { \n            name: NAME || 'Agent', \n            version: '1.0.0' \n          } \n        };\n      } else if (msg.method === 'tools/list') {\n        result = { \n          tools: [{ \n            name: SLUG || 'agent', \n            description: DESC || 'AI Agent', \n            inputSchema: { \n              type: 'object', \n              properties: { \n                query: { \n                  type: 'string', \n                  description: 'The query or message to send to the agent' \n                } \n              }, \n              required: ['query'] \n            } \n          }] \n        };\n      } else if (msg.method === 'tools/call') {\n        try {\n          if (!msg.params || !msg.params.arguments) {\n            throw new Error('Missing params.arguments in request');\n          }\n          const query = msg.params.arguments.query;\n          if (!query || typeof query !== 'string') {\n            throw new Error('Missing or invalid required parameter: query (must be a string)');\n          }\n          const headers = { 'Content-Type': 'application/json'  };\n          const res = await fetch(ENDPOINT, { \n            method: 'POST', \n            headers, \n            body: JSON.stringify({ query: query }) \n          });\n          if (!res.ok) {\n            const errText = await res.text();\n            throw new Error('API Error ' + res.status + ': ' + errText.substring(0, 200));\n          }\n          const data = await res.json();\n          const responseText = String(data.response || data.message || JSON.stringify(data));\n          result = { \n            content: [{ \n              type: 'text', \n              text: responseText \n            }] \n          };\n        } catch (callErr) {\n          result = { \n            content: [{ \n              type: 'text', \n              text: 'Error calling agent: ' + String(callErr.message || callErr) \n            }],\n            isError: true \n          };\n        }\n      } else {\n        throw new Error('Unknown method: ' + (msg.method || 'undefined'));\n      }\n      \n      if (result !== null) {\n        const response = { \n          jsonrpc: '2.0', \n          id: msg.id, \n          result: result \n        };\n        process.stdout.write(JSON.stringify(response) + '\\n');\n      }\n    } catch (err) {\n      console.error('MCP Error:', err.message || String(err));\n      try {\n        const parsedMsg = JSON.parse(line);\n        if (parsedMsg && parsedMsg.id !== null && parsedMsg.id !== undefined) {\n          const errorResponse = { \n            jsonrpc: '2.0', \n            id: parsedMsg.id, \n            error: { \n              code: -32603, \n              message: String(err.message || err || 'Internal error') \n            } \n          };\n          process.stdout.write(JSON.stringify(errorResponse) + '\\n');\n        }\n      } catch (parseErr) {\n        console.error('Failed to parse error response:', parseErr.message);\n      }\n    }\n  }\n});\n\nprocess.stdin.setEncoding('utf8');\nprocess.stdin.resume();\nconsole.error('population of canada MCP server ready');"
-                ],
+                "args": [str(script_path)],
                 "env": {
-                    "NODE_NO_WARNINGS": "1"
+                    "NODE_NO_WARNINGS": "1",
+                    "NODE_COMPILE_CACHE": str(tmp_path_factory.getbasetemp() / "node_compile_cache")
                 }
             }
         }
     }
-    return json.dumps(config)
+    return config
 
 
-class TestSmartQueryValidation:
-    """Test input validation for smart-query endpoint."""
+@pytest.fixture(scope="session")
+def warm_servers(playwright_config, population_canada_config):
+    """Start the integration servers side by side, once, before the tests that use them.
     
-    def test_missing_config_string(self, client):
-        """Test that missing configString returns error."""
-        response = client.post('/api/smart-query',
-                              json={
-                                  'serverName': 'test',
-                                  'toolName': 'test',
-                                  'query': 'test'
-                              })
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data['success'] is False
-        assert 'configString' in data['error']
+    Connections land in the app's pools, so each test reuses a running server
+    instead of paying its cold start in turn.
+    """
+    async def warm(config):
+        try:
+            async with pooled_connection(config):
+                pass
+        except Exception:
+            pass  # The tests themselves report connection failures
     
-    def test_missing_server_name(self, client):
-        """Test that missing serverName returns error."""
-        response = client.post('/api/smart-query',
-                              json={
-                                  'configString': '{}',
-                                  'toolName': 'test',
-                                  'query': 'test'
-                              })
-        assert response.status_code == 400
-        data = response.get_json()
-        assert data['success'] is False
-        assert 'serverName' in data['error']
+    async def warm_all():
+        await asyncio.gather(warm(playwright_config), warm(population_canada_config))
     
-    def test_missing_tool_name(self, client):
-        """Test that missing toolName returns error."""
-        response = client.post('/api/smart-query',
-                              json={
-                                  'configString': '{}',
-                                  'serverName': 'test',
-                                  'query': 'test'
-                              })
+    _run(warm_all())
+
+
+class TestSmartQueryValidation:
+    """Test input validation for smart-query endpoint."""
+    
+    @pytest.mark.parametrize("omit", ["configString", "serverName", "toolName", "query"])
+    def test_missing_field(self, client, omit):
+        """Test that each missing required field returns an error naming it."""
+        payload = {
+            'configString': '{}',
+            'serverName': 'test',
+            'toolName': 'test',
+            'query': 'test'
+        }
+        del payload[omit]
+        response = client.post('/api/smart-query', json=payload)
         assert response.status_code == 400
         data = response.get_json()
         assert data['success'] is False
-        assert 'toolName' in data['error']
-    
-    def test_missing_query(self, client):
-        """Test that missing query returns error."""
-        response = client.post('/api/smart-query',
-                              json={
-                                  'configString': '{}',
-                                  'serverName': 'test',
-                                  'toolName': 'test'
-                              })
+        assert omit in data['error']
+
+
+    def test_config_string_wrong_type(self, client):
+        """Test that a configString that is neither text nor an object is rejected."""
+        response = client.post('/api/smart-query', json={
+            'configString': [{'mcpServers': {}}],
+            'serverName': 'test',
+            'toolName': 'test',
+            'query': 'test'
+        })
         assert response.status_code == 400
         data = response.get_json()
         assert data['success'] is False
-        assert 'query' in data['error']
+        assert data['error'] == 'configString must be a JSON string or object'
 
 
 class TestSmartQueryDirect:
@@ -145,6 +158,7 @@ class TestSmartQueryDirect:
         assert 'Available tools' in data['error']
     
     @pytest.mark.integration
+    @pytest.mark.usefixtures("warm_servers")
     def test_direct_execution_playwright(self, client, playwright_config):
         """Test direct execution with Playwright browser_snapshot tool."""
         response = client.post('/api/smart-query',
@@ -167,6 +181,7 @@ class TestSmartQueryDirect:
             assert 'arguments_used' in data
     
     @pytest.mark.integration
+    @pytest.mark.usefixtures("warm_servers")
     def test_direct_execution_population(self, client, population_canada_config):
         """Test direct execution with population-of-canada tool."""
         response = client.post('/api/smart-query',
@@ -194,8 +209,8 @@ class TestSmartQueryWithAI:
     
     def test_ai_mode_without_openai_key(self, client, playwright_config, monkeypatch):
         """Test that AI mode fails gracefully without OpenAI API key."""
-        # Remove OpenAI key from environment
-        monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+        # The app reads its OpenAI configuration once at import, so patch that
+        monkeypatch.setattr(app_module, '_openai_ready', False)
         
         response = client.post('/api/smart-query',
                               json={
@@ -211,8 +226,8 @@ class TestSmartQueryWithAI:
             assert 'OpenAI' in data['error'] or 'API key' in data['error']
     
     @pytest.mark.integration
-    @pytest.mark.skipif(os.getenv('OPENAI_API_KEY') is None, 
-                       reason="OpenAI API key not configured")
+    @pytest.mark.usefixtures("warm_servers")
+    @pytest.mark.skipif(not HAS_OPENAI_KEY, reason="OpenAI API key not configured")
     def test_ai_execution_with_openai(self, client, population_canada_config):
         """Test AI-assisted execution with OpenAI."""
         response = client.post('/api/smart-query',
@@ -289,6 +304,7 @@ class TestSmartQueryResponseFormat:
         assert data['success'] is False
     
     @pytest.mark.integration
+    @pytest.mark.usefixtures("warm_servers")
     def test_success_response_format(self, client, playwright_config):
         """Test success response has consistent format."""
         response = client.post('/api/smart-query',
@@ -310,6 +326,32 @@ class TestSmartQueryResponseFormat:
             assert data['tool'] == 'browser_snapshot'
 
 
+class TestToolsSchema:
+    """Test the cached OpenAI tools schema built for AI queries."""
+    
+    TOOLS = {
+        'b-server': [{'name': 'first', 'inputSchema': {'type': 'object', 'properties': {}}}],
+        'a-server': [{'name': 'second'}],
+    }
+    
+    def test_keeps_server_order(self):
+        """Test that tools come out in the order the servers were given."""
+        tools_for_openai, tool_mapping = app_module.build_tools_schema(self.TOOLS)
+        names = [tool['function']['name'] for tool in tools_for_openai]
+        assert names == ['b-server_first', 'a-server_second']
+        assert list(tool_mapping) == names
+    
+    def test_callers_get_independent_copies(self):
+        """Test that mutating one result doesn't leak into the cached schema."""
+        tools_for_openai, tool_mapping = app_module.build_tools_schema(self.TOOLS)
+        tools_for_openai[0]['function']['parameters']['type'] = 'changed'
+        tool_mapping.clear()
+        
+        tools_for_openai, tool_mapping = app_module.build_tools_schema(self.TOOLS)
+        assert tools_for_openai[0]['function']['parameters']['type'] == 'object'
+        assert len(tool_mapping) == 2
+
+
 def test_smart_query_endpoint_exists(client):
     """Test that the smart-query endpoint exists and accepts POST."""
     response = client.get('/api/smart-query')
@@ -3,74 +3,71 @@ Test with UV-based Python MCP servers
 Demonstrates uvx command for Python MCP servers
 """
 import asyncio
-from rich.console import Console
+import sys
+from pathlib import Path
+from rich.table import Table
+from rich.text import Text
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
+
+# Static banner, markup parsed once at import
+_BANNER = Text.from_markup(
+    "[bold cyan]Testing UV-based Python MCP Servers[/bold cyan]\n\n"
+    "[yellow]This will test Python MCP servers using uvx command[/yellow]\n"
+    "[dim]Note: Requires uv/uvx to be installed on your system[/dim]\n"
+)
 
 
 async def main():
-    # Read config from file
-    with open("test_uv.json", "r") as f:
-        config_json = f.read()
+    # Read config from file in a worker thread while the banner prints
+    config_task = asyncio.create_task(asyncio.to_thread(Path("test_uv.json").read_bytes))
+    
+    console.print(_BANNER)
     
-    console.print("[bold cyan]Testing UV-based Python MCP Servers[/bold cyan]\n")
-    console.print("[yellow]This will test Python MCP servers using uvx command[/yellow]")
-    console.print("[dim]Note: Requires uv/uvx to be installed on your system[/dim]\n")
+    config_json = await config_task
     
     try:
         parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
+        # Command resolution does PATH lookups, so keep it off the event loop too
+        servers = await asyncio.to_thread(parser.parse_config, config_json, auto_resolve=True)
         
         console.print(f"[green]✓ Parsed {len(servers)} server(s)[/green]")
         
         console.print("\n[bold]Configured servers:[/bold]")
-        for name in servers.keys():
+        for name in servers:
             console.print(f"  • {name}")
         
         console.print("\n[cyan]Connecting to MCP servers...[/cyan]")
-        lister = MCPToolLister()
-        
-        try:
+        async with MCPToolLister() as lister:
             all_tools = await lister.list_all_tools(servers)
             
-            console.print("\n" + "="*80)
-            console.print("[bold green]Available Tools Summary[/bold green]")
-            console.print("="*80)
+            console.print("\n" + "="*80 + "\n[bold green]Available Tools Summary[/bold green]\n" + "="*80)
             
+            # Collect per-server counts into one table and render it once
+            summary = Table(show_header=True, header_style="bold magenta")
+            summary.add_column("Server", style="cyan")
+            summary.add_column("Tools", justify="right")
+            total_tools = 0
             for server_name, tools in all_tools.items():
-                console.print(f"  • [cyan]{server_name}[/cyan]: {len(tools)} tools")
+                count = len(tools)
+                total_tools += count
+                summary.add_row(server_name, str(count))
+            console.print(summary)
             
-            total_tools = sum(len(tools) for tools in all_tools.values())
             console.print(f"\n[bold green]Total tools across all servers: {total_tools}[/bold green]")
             
-            console.print("\n" + "="*80)
-            console.print("[bold green]Detailed Tool Listings[/bold green]")
-            console.print("="*80)
+            console.print("\n" + "="*80 + "\n[bold green]Detailed Tool Listings[/bold green]\n" + "="*80)
             
             lister.display_tools(all_tools)
-            
-        finally:
-            console.print("\n[cyan]Closing connections...[/cyan]")
-            try:
-                await lister.close_all_connections()
-            except Exception:
-                pass  # Suppress known cleanup warnings
     
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
 if __name__ == "__main__":
-    import warnings
-    import sys
-    
-    # Suppress ResourceWarnings from asyncio cleanup
-    warnings.filterwarnings("ignore", category=ResourceWarning)
-    
     try:
         asyncio.run(main())
     except (KeyboardInterrupt, asyncio.exceptions.CancelledError, SystemExit):
@@ -1,108 +1,149 @@
 """
 Test with weather MCP server (AccuWeather API)
+Run directly as a script, or collect it with pytest (async tests run on anyio).
 """
 import asyncio
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from rich.console import Console
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
 
-console = Console()
+CONFIG_PATH = Path(__file__).parent / "test_weather.json"
 
 
-async def main():
-    # Read config from file
-    with open("test_weather.json", "r") as f:
-        config_json = f.read()
+def _load_servers():
+    """Parse the weather server configuration."""
+    return ConfigParser.parse_config(CONFIG_PATH.read_bytes(), auto_resolve=True)
+
+
+@pytest.fixture(scope="session")
+def weather_servers():
+    """Weather server configuration, parsed once per session."""
+    return _load_servers()
+
+
+@pytest.fixture(scope="session")
+async def weather_lister(weather_servers):
+    """Connected lister and the tools it listed, skipped if the server won't start.
     
-    console.print("[cyan]Testing Weather MCP Server...[/cyan]\n")
+    Session-scoped, so the stdio server is spawned and initialized once and
+    every test reuses its session.
+    """
+    async with MCPToolLister() as lister:
+        all_tools = await lister.list_all_tools(weather_servers)
+        if not all_tools.get('weather'):
+            pytest.skip("weather MCP server is unavailable")
+        yield lister, all_tools
+
+
+def test_weather_config(weather_servers):
+    """The config file defines the weather server."""
+    console.print(f"[green]✓ Found {len(weather_servers)} server(s)[/green]")
     
-    try:
-        parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
+    # Render the listing as one block rather than one print per line
+    lines = ["\n[bold]Configured servers:[/bold]"]
+    for name, config in weather_servers.items():
+        lines.append(f"  • {name}")
+        lines.append(f"    Command: {config.command}")
+        lines.append(f"    Args: {config.args}")
+        lines.append(f"    Env vars: {list(config.env.keys()) if config.env else 'None'}")
+    console.print("\n".join(lines))
+    
+    assert 'weather' in weather_servers
+
+
+@pytest.mark.anyio
+async def test_list_weather_tools(weather_lister):
+    """The weather server lists at least one tool."""
+    lister, all_tools = weather_lister
+    
+    console.print("\n" + "="*80)
+    console.print("[bold green]Available Tools[/bold green]")
+    console.print("="*80)
+    
+    lister.display_tools(all_tools)
+    
+    total_tools = lister.total_tools
+    console.print(f"\n[bold green]Total tools across all servers: {total_tools}[/bold green]")
+    
+    assert all_tools.get('weather')
+
+
+@pytest.mark.anyio
+async def test_execute_weather_tool(weather_lister):
+    """The first weather tool runs with one of the common argument shapes."""
+    lister, all_tools = weather_lister
+    
+    console.print("\n[cyan]Testing weather tool execution...[/cyan]")
+    
+    # Get the first available tool
+    tool_name = all_tools['weather'][0].name
+    console.print(f"[yellow]Executing tool: {tool_name}[/yellow]")
+    
+    # Try to call the tool with sample arguments
+    session = lister.client.get_session('weather')
+    
+    # Different possible argument structures
+    test_args = [
+        {"location": "London"},
+        {"city": "London"},
+        {"query": "London"},
+        {}
+    ]
+    
+    # Try the shapes one at a time and stop at the first that works; the
+    # weather API is metered, so don't spend calls on shapes we won't use
+    for args in test_args:
+        try:
+            console.print(f"[dim]Trying arguments: {args}[/dim]")
+            result = await session.call_tool(tool_name, args)
+        except Exception as e:
+            console.print(f"[yellow]Failed with {args}: {str(e)[:100]}[/yellow]")
+            continue
         
-        console.print(f"[green]✓ Found {len(servers)} server(s)[/green]")
+        console.print(f"[green]✓ Tool executed successfully with {args}![/green]")
+        console.print(f"[bold]Result:[/bold]")
         
-        console.print("\n[bold]Configured servers:[/bold]")
-        for name, config in servers.items():
-            console.print(f"  • {name}")
-            console.print(f"    Command: {config.command}")
-            console.print(f"    Args: {config.args}")
-            console.print(f"    Env vars: {list(config.env.keys()) if config.env else 'None'}")
+        if hasattr(result, 'content') and result.content:
+            console.print("\n".join(
+                item.text if hasattr(item, 'text') else str(item)
+                for item in result.content
+            ))
+        else:
+            console.print(str(result))
         
-        console.print("\n[cyan]Connecting to MCP servers...[/cyan]")
-        lister = MCPToolLister()
+        break  # Success, skip the remaining shapes
+    else:
+        raise AssertionError(f"{tool_name} failed with every argument shape")
+
+
+async def main():
+    console.print("[cyan]Testing Weather MCP Server...[/cyan]\n")
+    
+    try:
+        servers = _load_servers()
+        test_weather_config(servers)
         
-        try:
+        console.print("\n[cyan]Connecting to MCP servers...[/cyan]")
+        async with MCPToolLister() as lister:
             all_tools = await lister.list_all_tools(servers)
             
-            console.print("\n" + "="*80)
-            console.print("[bold green]Available Tools[/bold green]")
-            console.print("="*80)
-            
-            lister.display_tools(all_tools)
-            
-            total_tools = sum(len(tools) for tools in all_tools.values())
-            console.print(f"\n[bold green]Total tools across all servers: {total_tools}[/bold green]")
+            await test_list_weather_tools((lister, all_tools))
             
             # Try to execute a weather tool if available
             if all_tools.get('weather'):
-                console.print("\n[cyan]Testing weather tool execution...[/cyan]")
-                
-                # Get the first available tool
-                first_tool = all_tools['weather'][0] if all_tools['weather'] else None
-                
-                if first_tool:
-                    tool_name = first_tool['name']
-                    console.print(f"[yellow]Executing tool: {tool_name}[/yellow]")
-                    
-                    # Try to call the tool with sample arguments
-                    session = lister.client.get_session('weather')
-                    
-                    # Different possible argument structures
-                    test_args = [
-                        {"location": "London"},
-                        {"city": "London"},
-                        {"query": "London"},
-                        {}
-                    ]
-                    
-                    for args in test_args:
-                        try:
-                            console.print(f"[dim]Trying with args: {args}[/dim]")
-                            result = await session.call_tool(tool_name, args)
-                            
-                            console.print(f"[green]✓ Tool executed successfully![/green]")
-                            console.print(f"[bold]Result:[/bold]")
-                            
-                            if hasattr(result, 'content') and result.content:
-                                for item in result.content:
-                                    if hasattr(item, 'text'):
-                                        console.print(item.text)
-                                    else:
-                                        console.print(str(item))
-                            else:
-                                console.print(str(result))
-                            
-                            break  # Success, stop trying
-                            
-                        except Exception as e:
-                            console.print(f"[yellow]Failed with {args}: {str(e)[:100]}[/yellow]")
-                            continue
-            
-        finally:
-            console.print("\n[cyan]Closing connections...[/cyan]")
-            await lister.close_all_connections()
+                await test_execute_weather_tool((lister, all_tools))
     
     except Exception as e:
         console.print(f"\n[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
 if __name__ == "__main__":
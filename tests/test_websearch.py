@@ -3,16 +3,24 @@ Test Web Search MCP with OpenAI API Integration
 Demonstrates web search capabilities with AI-powered content generation
 """
 import asyncio
+from pathlib import Path
 import os
-import sys
 import warnings
 from typing import Dict, List, Any
-from rich.console import Console
+import orjson
+from rich.console import Group
 from rich.panel import Panel
 from rich.markdown import Markdown
+from rich.text import Text
+from console_utils import console
 from config import ConfigParser
 from mcp_client import MCPToolLister
-from mcp_use import MCPClient
+
+try:
+    import uvloop
+    _run = uvloop.run
+except ImportError:  # uvloop is optional (and not available on Windows)
+    _run = asyncio.run
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
@@ -22,8 +30,6 @@ load_dotenv()
 warnings.filterwarnings('ignore')
 os.environ['PYTHONWARNINGS'] = 'ignore'
 
-console = Console()
-
 # OpenAI API Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
@@ -33,33 +39,26 @@ class WebSearchWithAI:
     """Integrate web search MCP tools with OpenAI API."""
     
     def __init__(self):
+        self.lister = MCPToolLister()
         self.client = None
         self.tools = []
+        self.openai_tools = []
         self.openai_client = None
         
     async def initialize(self, servers: Dict[str, Any]):
         """Initialize MCP client and connect to servers."""
         try:
-            # Build config for MCPClient
-            config = {"mcpServers": {}}
-            for name, server_config in servers.items():
-                server_def = {
-                    "command": server_config.command,
-                    "args": server_config.args,
-                }
-                if server_config.env:
-                    server_def["env"] = server_config.env
-                config["mcpServers"][name] = server_def
-            
-            # Create client and establish sessions
-            self.client = MCPClient(config)
-            await self.client.create_all_sessions()
+            # The lister owns the sessions, so its tool listing can reuse them
+            await self.lister.connect_to_servers(servers)
+            self.client = self.lister.client
             console.print("[green]✓ Connected to web-search MCP server[/green]")
             
             # Get available tools
             session = self.client.get_session("web-search")
             result = await session.list_tools()
             self.tools = result.tools if hasattr(result, 'tools') else result
+            # Tool schemas don't change for the session, so format them once
+            self.openai_tools = [self.format_tool_for_openai(tool) for tool in self.tools]
             console.print(f"[green]✓ Found {len(self.tools)} tools[/green]")
             
             return True
@@ -135,11 +134,24 @@ class WebSearchWithAI:
         console.print("\n[cyan]Generating AI-powered summary...[/cyan]")
         await self._generate_content_with_openai(query, search_data)
     
+    @staticmethod
+    def _serialize_tool_result(tool_result: Any) -> str:
+        """Reduce an MCP tool result to the text the model actually needs."""
+        content = getattr(tool_result, 'content', None)
+        if isinstance(content, list):
+            texts = [item.text for item in content if hasattr(item, 'text')]
+            if texts:
+                return "\n".join(texts)
+        if isinstance(tool_result, str):
+            return tool_result
+        try:
+            return orjson.dumps(tool_result).decode()
+        except TypeError:
+            return str(tool_result)
+    
     def _extract_search_data(self, search_result: Any) -> List[Dict[str, Any]]:
         """Extract search results from MCP tool response."""
         try:
-            import json
-            
             # Handle different result formats
             if hasattr(search_result, 'content'):
                 content = search_result.content
@@ -149,7 +161,7 @@ class WebSearchWithAI:
                         text_content = first_item.text
                         # Try to parse as JSON
                         try:
-                            parsed = json.loads(text_content)
+                            parsed = orjson.loads(text_content)
                             # If it's already a list, return it
                             if isinstance(parsed, list):
                                 return parsed
@@ -158,20 +170,20 @@ class WebSearchWithAI:
                                 return parsed['results']
                             # Single result, wrap in list
                             return [parsed]
-                        except json.JSONDecodeError:
+                        except orjson.JSONDecodeError:
                             # Not JSON, treat as plain text result
                             return [{"title": "Search Result", "snippet": text_content, "url": ""}]
             
             # Handle string response
             if isinstance(search_result, str):
                 try:
-                    parsed = json.loads(search_result)
+                    parsed = orjson.loads(search_result)
                     if isinstance(parsed, list):
                         return parsed
                     if isinstance(parsed, dict) and 'results' in parsed:
                         return parsed['results']
                     return [parsed]
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     return [{"title": "Search Result", "snippet": search_result, "url": ""}]
             
             # Fallback: try to convert to dict
@@ -181,8 +193,7 @@ class WebSearchWithAI:
             return []
         except Exception as e:
             console.print(f"[red]Error extracting search data: {e}[/red]")
-            import traceback
-            traceback.print_exc()
+            console.print_exception(show_locals=False)
             return []
     
     def _display_search_results(self, results: List[Dict[str, Any]]):
@@ -191,14 +202,15 @@ class WebSearchWithAI:
             console.print("[yellow]No results found[/yellow]")
             return
         
+        # Plain Text parts skip markup parsing (and can't be broken by brackets in results)
+        lines = []
         for i, result in enumerate(results, 1):
-            title = result.get('title', 'No title')
-            url = result.get('url', 'No URL')
-            snippet = result.get('snippet', result.get('description', 'No description'))
-            
-            console.print(f"\n[bold]{i}. {title}[/bold]")
-            console.print(f"[blue]{url}[/blue]")
-            console.print(f"[dim]{snippet}[/dim]")
+            lines += (
+                Text(f"\n{i}. {result.get('title', 'No title')}", style="bold"),
+                Text(str(result.get('url', 'No URL')), style="blue"),
+                Text(str(result.get('snippet', result.get('description', 'No description'))), style="dim"),
+            )
+        console.print(Group(*lines))
     
     async def _generate_content_with_openai(self, query: str, search_data: List[Dict[str, Any]]):
         """Generate content using OpenAI API based on search results."""
@@ -253,103 +265,68 @@ Provide a well-structured summary that:
     
     def _prepare_search_context(self, search_data: List[Dict[str, Any]]) -> str:
         """Prepare search results as context for OpenAI."""
-        context_parts = []
-        for i, result in enumerate(search_data, 1):
-            title = result.get('title', 'No title')
-            url = result.get('url', '')
-            snippet = result.get('snippet', result.get('description', ''))
-            
-            context_parts.append(f"Source {i}: {title}\nURL: {url}\n{snippet}\n")
-        
-        return "\n---\n".join(context_parts)
+        return "\n---\n".join(
+            f"Source {i}: {result.get('title', 'No title')}\n"
+            f"URL: {result.get('url', '')}\n"
+            f"{result.get('snippet', result.get('description', ''))}\n"
+            for i, result in enumerate(search_data, 1)
+        )
     
     async def close(self):
         """Close all connections."""
-        if self.client:
-            try:
-                await self.client.close_all_sessions()
-                console.print("[dim]Closed all connections[/dim]")
-            except Exception as e:
-                if "cancel scope" not in str(e).lower():
-                    console.print(f"[red]Error closing connections: {e}[/red]")
+        await self.lister.close_all_connections()
+        self.client = None
 
 
-async def test_list_tools():
+async def run_list_tools(lister: MCPToolLister):
     """Test 1: List all available web search tools."""
     console.print(Panel.fit(
         "[bold]Test 1: List Web Search MCP Tools[/bold]",
         border_style="cyan"
     ))
     
-    with open("test_websearch.json", "r") as f:
-        config_json = f.read()
-    
     try:
-        parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
+        # Reuse the already-open session rather than spawning the server again
+        all_tools = {"web-search": await lister.get_tools_from_server("web-search")}
         
-        console.print(f"[green]✓ Found {len(servers)} server(s)[/green]")
+        console.print("\n" + "="*80)
+        console.print("[bold green]Available Web Search Tools[/bold green]")
+        console.print("="*80)
         
-        lister = MCPToolLister()
-        try:
-            all_tools = await lister.list_all_tools(servers)
-            
-            console.print("\n" + "="*80)
-            console.print("[bold green]Available Web Search Tools[/bold green]")
-            console.print("="*80)
-            
-            lister.display_tools(all_tools)
-            
-            total_tools = sum(len(tools) for tools in all_tools.values())
-            console.print(f"\n[bold green]Total tools available: {total_tools}[/bold green]")
-            
-        finally:
-            await lister.close_all_connections()
+        lister.display_tools(all_tools)
+        
+        total_tools = sum(len(tools) for tools in all_tools.values())
+        console.print(f"\n[bold green]Total tools available: {total_tools}[/bold green]")
     
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
-async def test_search_and_generate():
+async def run_search_and_generate(ws_ai: WebSearchWithAI):
     """Test 2: Perform search and generate content with OpenAI."""
     console.print(Panel.fit(
         "[bold]Test 2: Web Search + OpenAI Content Generation[/bold]",
         border_style="cyan"
     ))
     
-    with open("test_websearch.json", "r") as f:
-        config_json = f.read()
-    
     try:
-        parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
-        
-        ws_ai = WebSearchWithAI()
-        if not await ws_ai.initialize(servers):
-            return
+        # Test searches; search_and_generate always runs the MCP search and
+        # only skips the OpenAI step when no key is set
+        test_queries = [
+            ("latest events in Jaipur Rajasthan", "duckduckgo"),
+        ]
         
-        try:
-            # Test searches
-            test_queries = [
-                ("latest events in Jaipur Rajasthan", "duckduckgo"),
-            ]
-            
-            for query, engine in test_queries:
-                await ws_ai.search_and_generate(query, engine)
-                console.print("\n" + "="*80 + "\n")
-        
-        finally:
-            await ws_ai.close()
+        for query, engine in test_queries:
+            await ws_ai.search_and_generate(query, engine)
+            console.print("\n" + "="*80 + "\n")
     
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
-async def test_openai_function_calling():
+async def run_openai_function_calling(ws_ai: WebSearchWithAI):
     """Test 3: Use web search tools with OpenAI function calling."""
     console.print(Panel.fit(
         "[bold]Test 3: OpenAI Function Calling with Web Search[/bold]",
@@ -361,105 +338,93 @@ async def test_openai_function_calling():
         console.print("[dim]Set OPENAI_API_KEY environment variable to enable AI features.[/dim]")
         return
     
-    with open("test_websearch.json", "r") as f:
-        config_json = f.read()
-    
     try:
         from openai import AsyncOpenAI
         
-        parser = ConfigParser()
-        servers = parser.parse_config(config_json, auto_resolve=True)
+        # Prepare tools for OpenAI
+        openai_tools = ws_ai.openai_tools
         
-        ws_ai = WebSearchWithAI()
-        if not await ws_ai.initialize(servers):
-            return
+        console.print(f"[green]✓ Prepared {len(openai_tools)} tools for OpenAI[/green]")
         
-        try:
-            # Prepare tools for OpenAI
-            openai_tools = [ws_ai.format_tool_for_openai(tool) for tool in ws_ai.tools]
+        # Create OpenAI client
+        openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        
+        # User query
+        user_query = "What are the latest events happening in Jaipur, Rajasthan? Please search and summarize."
+        
+        console.print(f"\n[bold cyan]User Query:[/bold cyan] {user_query}\n")
+        
+        # First API call - let OpenAI decide to use tools
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant with access to web search tools. Use them to provide accurate, up-to-date information."},
+            {"role": "user", "content": user_query}
+        ]
+        
+        response = await openai_client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            tools=openai_tools,
+            tool_choice="auto"
+        )
+        
+        response_message = response.choices[0].message
+        
+        # Check if OpenAI wants to call a tool
+        if response_message.tool_calls:
+            console.print("[cyan]OpenAI is calling web search tools...[/cyan]\n")
             
-            console.print(f"[green]✓ Prepared {len(openai_tools)} tools for OpenAI[/green]")
+            messages.append(response_message)
             
-            # Create OpenAI client
-            openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+            # Decode and announce each tool call, then run them concurrently
+            tool_calls = response_message.tool_calls
+            calls = []
+            for tool_call in tool_calls:
+                function_name = tool_call.function.name
+                function_args = orjson.loads(tool_call.function.arguments)
+                
+                console.print(f"[bold]Calling tool:[/bold] {function_name}")
+                console.print(f"[dim]Arguments: {function_args}[/dim]")
+                calls.append(ws_ai.call_tool(function_name, function_args))
             
-            # User query
-            user_query = "What are the latest events happening in Jaipur, Rajasthan? Please search and summarize."
+            tool_results = await asyncio.gather(*calls)
             
-            console.print(f"\n[bold cyan]User Query:[/bold cyan] {user_query}\n")
+            # Add tool responses to messages, in the order OpenAI asked for them
+            for tool_call, tool_result in zip(tool_calls, tool_results):
+                messages.append({
+                    "tool_call_id": tool_call.id,
+                    "role": "tool",
+                    "name": tool_call.function.name,
+                    "content": ws_ai._serialize_tool_result(tool_result)
+                })
             
-            # First API call - let OpenAI decide to use tools
-            messages = [
-                {"role": "system", "content": "You are a helpful assistant with access to web search tools. Use them to provide accurate, up-to-date information."},
-                {"role": "user", "content": user_query}
-            ]
+            # Second API call - get final response
+            console.print("\n[cyan]Getting final response from OpenAI...[/cyan]\n")
             
-            response = await openai_client.chat.completions.create(
+            final_response = await openai_client.chat.completions.create(
                 model=OPENAI_MODEL,
-                messages=messages,
-                tools=openai_tools,
-                tool_choice="auto"
+                messages=messages
             )
             
-            response_message = response.choices[0].message
+            final_message = final_response.choices[0].message.content
             
-            # Check if OpenAI wants to call a tool
-            if response_message.tool_calls:
-                console.print("[cyan]OpenAI is calling web search tools...[/cyan]\n")
-                
-                messages.append(response_message)
-                
-                # Execute each tool call
-                for tool_call in response_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = eval(tool_call.function.arguments)
-                    
-                    console.print(f"[bold]Calling tool:[/bold] {function_name}")
-                    console.print(f"[dim]Arguments: {function_args}[/dim]")
-                    
-                    # Call the MCP tool
-                    tool_result = await ws_ai.call_tool(function_name, function_args)
-                    
-                    # Add tool response to messages
-                    messages.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": str(tool_result)
-                    })
-                
-                # Second API call - get final response
-                console.print("\n[cyan]Getting final response from OpenAI...[/cyan]\n")
-                
-                final_response = await openai_client.chat.completions.create(
-                    model=OPENAI_MODEL,
-                    messages=messages
-                )
-                
-                final_message = final_response.choices[0].message.content
-                
-                console.print(Panel(
-                    Markdown(final_message),
-                    title="[bold green]Final AI Response[/bold green]",
-                    border_style="green"
-                ))
-            else:
-                # No tool call needed
-                console.print(Panel(
-                    response_message.content,
-                    title="[bold yellow]Direct Response (No Tool Call)[/bold yellow]",
-                    border_style="yellow"
-                ))
-        
-        finally:
-            await ws_ai.close()
+            console.print(Panel(
+                Markdown(final_message),
+                title="[bold green]Final AI Response[/bold green]",
+                border_style="green"
+            ))
+        else:
+            # No tool call needed
+            console.print(Panel(
+                response_message.content,
+                title="[bold yellow]Direct Response (No Tool Call)[/bold yellow]",
+                border_style="yellow"
+            ))
     
     except ImportError:
         console.print("[red]OpenAI library not installed. Install with: pip install openai[/red]")
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        console.print_exception(show_locals=False)
 
 
 async def main():
@@ -472,15 +437,34 @@ async def main():
     console.print(f"  OpenAI Model: {OPENAI_MODEL}")
     console.print()
     
-    # Run tests
-    await test_list_tools()
-    console.print("\n" + "="*80 + "\n")
+    try:
+        # Read and resolve the config off the event loop
+        config_json = await asyncio.to_thread(Path("test_websearch.json").read_bytes)
+        servers = await asyncio.to_thread(ConfigParser.parse_config, config_json, auto_resolve=True)
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+        return
+    
+    console.print(f"[green]✓ Found {len(servers)} server(s)[/green]")
+    
+    # Start the web-search server once and share its session across all tests
+    ws_ai = WebSearchWithAI()
+    if not await ws_ai.initialize(servers):
+        return
     
-    await test_search_and_generate()
-    console.print("\n" + "="*80 + "\n")
+    try:
+        # Run tests
+        await run_list_tools(ws_ai.lister)
+        console.print("\n" + "="*80 + "\n")
+        
+        await run_search_and_generate(ws_ai)
+        console.print("\n" + "="*80 + "\n")
+        
+        await run_openai_function_calling(ws_ai)
     
-    await test_openai_function_calling()
+    finally:
+        await ws_ai.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    _run(main())